@@ -0,0 +1,264 @@
+'''
+Table-based AES-128 (byte-oriented, same API as `AES128` of AES.sage)
+
+The state is a list of 16 bytes (column-major, as the input block), and a round is
+4 T-table lookups per column. The key schedule is computed once in the constructor.
+
+This module does not require Sage: AES.sage checks that both implementations agree.
+With NumPy, `encrypt_many` / `decrypt_many` encrypt (N, 16) uint8 arrays of blocks at once.
+'''
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+def xtime(x):
+  x <<= 1
+  if x & 0x100:
+    x ^= 0x11b
+  return x
+
+def gf_mul(a, b):
+  '''
+  a * b in GF(2^8) = F_2[x] / (x^8 + x^4 + x^3 + x + 1)
+  '''
+  ret = 0
+  while b > 0:
+    if b & 1:
+      ret ^= a
+    a = xtime(a)
+    b >>= 1
+  return ret
+
+def gf_inv(a):
+  '''
+  a^-1 = a^254 (0^-1 := 0)
+  '''
+  ret = 1
+  for _ in xrange(254):
+    ret = gf_mul(ret, a)
+  return ret if a != 0 else 0
+
+def affine(x):
+  ret = 0
+  for i in xrange(8):
+    b = (x >> i) ^ (x >> ((i + 4) % 8)) ^ (x >> ((i + 5) % 8)) ^ (x >> ((i + 6) % 8)) ^ (x >> ((i + 7) % 8))
+    ret |= (b & 1) << i
+  return ret ^ 0x63
+
+SBOX = [affine(gf_inv(x)) for x in xrange(256)]
+SBOX_INV = [0] * 256
+for x, y in enumerate(SBOX):
+  SBOX_INV[y] = x
+del x, y
+
+MUL = dict((c, [gf_mul(x, c) for x in xrange(256)]) for c in [2, 3, 9, 11, 13, 14])
+
+# Te[i][x]: column of MixColumns(SubBytes(x) at row i) (packed as row0 << 24 | ... | row3)
+# Td[i][x]: column of MixColumnsInv(x at row i)
+def column(c, i):
+  c = c[-i:] + c[:-i] if i > 0 else c
+  return (c[0] << 24) | (c[1] << 16) | (c[2] << 8) | c[3]
+
+Te = [[column([MUL[2][SBOX[x]], SBOX[x], SBOX[x], MUL[3][SBOX[x]]], i) for x in xrange(256)] for i in xrange(4)]
+Td = [[column([MUL[14][x], MUL[9][x], MUL[13][x], MUL[11][x]], i) for x in xrange(256)] for i in xrange(4)]
+
+# ShiftRows: new state[i] = state[SHIFT_ROWS[i]] (state[4 * col + row])
+SHIFT_ROWS = [4 * ((i // 4 + i % 4) % 4) + i % 4 for i in xrange(16)]
+SHIFT_ROWS_INV = [SHIFT_ROWS.index(i) for i in xrange(16)]
+
+RCON = [1]
+for _ in xrange(32):
+  RCON += [xtime(RCON[-1])]
+
+def expand_key(key, rounds):
+  '''
+  AES-128 key schedule: (rounds + 1) * 16 bytes of round keys
+  '''
+  key = list(key)
+  i = 0
+  while len(key) < (rounds + 1) * 16:
+    t = key[-4:]
+    if len(key) % 16 == 0:
+      t = [SBOX[x] for x in t[1:] + t[:1]]
+      t[0] ^= RCON[i]
+      i += 1
+    key += [key[-16 + j] ^ t[j] for j in xrange(4)]
+  return key[:(rounds + 1) * 16]
+
+def invert_key_schedule(k, r):
+  '''
+  AES-128 master key from the r-th round key `k` (inverse of `expand_key`)
+  '''
+  w = [list(k[4 * j:4 * j + 4]) for j in xrange(4)]
+  for i in xrange(r, 0, -1):
+    prev = [None] * 4
+    for j in xrange(3, 0, -1):
+      prev[j] = [x ^ y for x, y in zip(w[j], w[j - 1])]
+    t = [SBOX[x] for x in prev[3][1:] + prev[3][:1]]
+    t[0] ^= RCON[i - 1]
+    prev[0] = [x ^ y for x, y in zip(w[0], t)]
+    w = prev
+  return sum(w, [])
+
+if np is not None:
+  SBOX_NP = np.array(SBOX, dtype=np.uint8)
+  SBOX_INV_NP = np.array(SBOX_INV, dtype=np.uint8)
+  MUL_NP = dict((c, np.array(MUL[c], dtype=np.uint8)) for c in MUL)
+  SHIFT_ROWS_NP = np.array(SHIFT_ROWS)
+  SHIFT_ROWS_INV_NP = np.array(SHIFT_ROWS_INV)
+
+  def mix_columns_many(a, coeffs):
+    '''
+    MixColumns (coeffs = [2, 3, 1, 1]) or MixColumnsInv (coeffs = [14, 11, 13, 9]) of (N, 16) array
+    '''
+    a = a.reshape(-1, 4, 4)
+    ret = np.zeros_like(a)
+    for i, c in enumerate(coeffs):
+      t = np.roll(a, -i, axis=2)
+      ret ^= t if c == 1 else MUL_NP[c][t]
+    return ret.reshape(-1, 16)
+
+def to_columns(m):
+  return [(m[4 * c] << 24) | (m[4 * c + 1] << 16) | (m[4 * c + 2] << 8) | m[4 * c + 3] for c in xrange(4)]
+
+def from_columns(w):
+  ret = []
+  for x in w:
+    ret += [x >> 24, (x >> 16) & 0xff, (x >> 8) & 0xff, x & 0xff]
+  return ret
+
+class AES128(object):
+  def __init__(s, rounds, key, schedule=True):
+    assert len(key) == 16
+    s.key = key
+    s.rounds = rounds
+    s.schedule = schedule
+    s.KeyExpansions()
+    s.round_keys = [to_columns(s.keys[16 * r:16 * (r + 1)]) for r in xrange(rounds + 1)]
+    # round keys for the equivalent inverse cipher: MixColumnsInv(k) (except the first and last ones)
+    s.round_keys_inv = [s.round_keys[0]]
+    for r in xrange(1, rounds):
+      s.round_keys_inv += [to_columns(s.MixColumnsInv(s.keys[16 * r:16 * (r + 1)]))]
+    s.round_keys_inv += [s.round_keys[rounds]]
+
+  def KeyExpansions(s):
+    if s.schedule:
+      s.keys = expand_key(s.key, s.rounds)
+    else:
+      s.keys = list(s.key) * (s.rounds + 1)
+
+  def AddRoundKey(s, m, k):
+    return [x ^ y for x, y in zip(m, k)]
+
+  def SubBytes(s, m):
+    return [SBOX[x] for x in m]
+
+  def SubBytesInv(s, m):
+    return [SBOX_INV[x] for x in m]
+
+  def ShiftRows(s, m):
+    return [m[i] for i in SHIFT_ROWS]
+
+  def ShiftRowsInv(s, m):
+    return [m[i] for i in SHIFT_ROWS_INV]
+
+  def MixColumns(s, m):
+    ret = []
+    for c in xrange(4):
+      a = m[4 * c:4 * c + 4]
+      ret += [MUL[2][a[i]] ^ MUL[3][a[(i + 1) % 4]] ^ a[(i + 2) % 4] ^ a[(i + 3) % 4] for i in xrange(4)]
+    return ret
+
+  def MixColumnsInv(s, m):
+    ret = []
+    for c in xrange(4):
+      a = m[4 * c:4 * c + 4]
+      ret += [MUL[14][a[i]] ^ MUL[11][a[(i + 1) % 4]] ^ MUL[13][a[(i + 2) % 4]] ^ MUL[9][a[(i + 3) % 4]] for i in xrange(4)]
+    return ret
+
+  def encrypt(s, m):
+    assert len(m) == 16
+    T0, T1, T2, T3 = Te
+    k = s.round_keys[0]
+    w0, w1, w2, w3 = [x ^ y for x, y in zip(to_columns(m), k)]
+    for r in xrange(1, s.rounds):
+      k = s.round_keys[r]
+      w0, w1, w2, w3 = (
+        T0[w0 >> 24] ^ T1[(w1 >> 16) & 0xff] ^ T2[(w2 >> 8) & 0xff] ^ T3[w3 & 0xff] ^ k[0],
+        T0[w1 >> 24] ^ T1[(w2 >> 16) & 0xff] ^ T2[(w3 >> 8) & 0xff] ^ T3[w0 & 0xff] ^ k[1],
+        T0[w2 >> 24] ^ T1[(w3 >> 16) & 0xff] ^ T2[(w0 >> 8) & 0xff] ^ T3[w1 & 0xff] ^ k[2],
+        T0[w3 >> 24] ^ T1[(w0 >> 16) & 0xff] ^ T2[(w1 >> 8) & 0xff] ^ T3[w2 & 0xff] ^ k[3],
+      )
+    # last round: SubBytes, ShiftRows, AddRoundKey
+    m = s.ShiftRows(s.SubBytes(from_columns([w0, w1, w2, w3])))
+    return s.AddRoundKey(m, s.keys[16 * s.rounds:])
+
+  def decrypt(s, m):
+    assert len(m) == 16
+    T0, T1, T2, T3 = Td
+    S = SBOX_INV
+    # equivalent inverse cipher: (ShiftRowsInv, SubBytesInv, AddRoundKey, MixColumnsInv) =
+    #   (SubBytesInv, ShiftRowsInv, MixColumnsInv, AddRoundKey(MixColumnsInv(k)))
+    k = s.round_keys_inv[s.rounds]
+    w0, w1, w2, w3 = [x ^ y for x, y in zip(to_columns(m), k)]
+    for r in xrange(s.rounds - 1, 0, -1):
+      k = s.round_keys_inv[r]
+      w0, w1, w2, w3 = (
+        T0[S[w0 >> 24]] ^ T1[S[(w3 >> 16) & 0xff]] ^ T2[S[(w2 >> 8) & 0xff]] ^ T3[S[w1 & 0xff]] ^ k[0],
+        T0[S[w1 >> 24]] ^ T1[S[(w0 >> 16) & 0xff]] ^ T2[S[(w3 >> 8) & 0xff]] ^ T3[S[w2 & 0xff]] ^ k[1],
+        T0[S[w2 >> 24]] ^ T1[S[(w1 >> 16) & 0xff]] ^ T2[S[(w0 >> 8) & 0xff]] ^ T3[S[w3 & 0xff]] ^ k[2],
+        T0[S[w3 >> 24]] ^ T1[S[(w2 >> 16) & 0xff]] ^ T2[S[(w1 >> 8) & 0xff]] ^ T3[S[w0 & 0xff]] ^ k[3],
+      )
+    m = s.SubBytesInv(s.ShiftRowsInv(from_columns([w0, w1, w2, w3])))
+    return s.AddRoundKey(m, s.keys[:16])
+
+  def encrypt_many(s, ms):
+    '''
+    Encrypt (N, 16) uint8 array of blocks at once (requires NumPy)
+    '''
+    assert np is not None, 'NumPy is required'
+    K = np.array(s.keys, dtype=np.uint8).reshape(-1, 16)
+    m = np.asarray(ms, dtype=np.uint8).reshape(-1, 16) ^ K[0]
+    for r in xrange(1, s.rounds):
+      m = mix_columns_many(SBOX_NP[m][:, SHIFT_ROWS_NP], [2, 3, 1, 1]) ^ K[r]
+    return SBOX_NP[m][:, SHIFT_ROWS_NP] ^ K[s.rounds]
+
+  def decrypt_many(s, cs):
+    assert np is not None, 'NumPy is required'
+    K = np.array(s.keys, dtype=np.uint8).reshape(-1, 16)
+    m = SBOX_INV_NP[(np.asarray(cs, dtype=np.uint8).reshape(-1, 16) ^ K[s.rounds])[:, SHIFT_ROWS_INV_NP]]
+    for r in xrange(s.rounds - 1, 0, -1):
+      m = SBOX_INV_NP[mix_columns_many(m ^ K[r], [14, 11, 13, 9])[:, SHIFT_ROWS_INV_NP]]
+    return m ^ K[0]
+
+def main():
+  test_vec = [219, 19, 83, 69]
+  assert AES128(1, [0] * 16).MixColumns(test_vec * 4)[:4] == [142, 77, 161, 188]
+  for i in xrange(256):
+    assert SBOX_INV[SBOX[i]] == i
+  assert SBOX[0x53] == 0xed
+  cipher = AES128(10, [0] * 16)
+  assert cipher.keys[16:32] == [0x62, 0x63, 0x63, 0x63] * 4
+  assert cipher.keys[-16:] == [0xb4, 0xef, 0x5b, 0xcb, 0x3e, 0x92, 0xe2, 0x11, 0x23, 0xe9, 0x51, 0xcf, 0x6f, 0x8f, 0x18, 0x8e]
+  cipher = AES128(10, map(ord, '5468617473206D79204B756E67204675'.decode('hex')))
+  test_plain = map(ord, '54776F204F6E65204E696E652054776F'.decode('hex'))
+  test_cipher = map(ord, '29c3505f571420f6402299b31a02d73a'.decode('hex'))
+  assert cipher.encrypt(test_plain) == test_cipher
+  assert cipher.decrypt(test_cipher) == test_plain
+  # FIPS-197 Appendix C.1
+  cipher = AES128(10, range(16))
+  test_plain = [0x11 * i for i in xrange(16)]
+  assert cipher.encrypt(test_plain) == map(ord, '69c4e0d86a7b0430d8cdb78070b4c55a'.decode('hex'))
+  for rounds in xrange(1, 11):
+    for schedule in [True, False]:
+      cipher = AES128(rounds, range(16, 32), schedule)
+      assert cipher.decrypt(cipher.encrypt(test_plain)) == test_plain
+      assert invert_key_schedule(cipher.keys[-16:], rounds) == cipher.keys[:16] or not schedule
+      if np is not None:
+        c = cipher.encrypt_many([test_plain] * 2)
+        assert c.tolist() == [cipher.encrypt(test_plain)] * 2
+        assert cipher.decrypt_many(c).tolist() == [test_plain] * 2
+
+if __name__ == '__main__':
+  main()
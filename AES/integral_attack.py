@@ -0,0 +1,103 @@
+from aes_table import AES128, SBOX_INV_NP, invert_key_schedule
+import numpy as np
+import os
+import time
+
+'''
+Batched integral attack to 4-round AES-128 (cf. 4_round_integral_attack.sage)
+
+A Lambda-set (one active byte, the others constant) is balanced after 3 rounds, so the last round key byte k[j]
+satisfies XOR_{c in set} SBoxInv(c[j] ^ k[j]) = 0. All Lambda-sets are encrypted in one call of `encrypt_many`,
+all (byte, guess) pairs are scored at once by XOR-reduction over the set, and the candidates of each byte are
+intersected over Lambda-sets until they are unique.
+'''
+
+def lambda_sets(actives, rand=None):
+  '''
+  Plaintexts of Lambda-sets: ret[i][x] has x at the byte `actives[i]` and random constants at the other bytes
+
+  Returns:
+    uint8 array of shape (len(actives), 256, 16)
+  '''
+  if rand is None:
+    rand = np.random.RandomState()
+  ret = np.repeat(rand.randint(0, 256, (len(actives), 1, 16)).astype(np.uint8), 256, axis=1)
+  for i, j in enumerate(actives):
+    ret[i, :, j] = np.arange(256)
+  return ret
+
+def collect_many(cipher, actives, rand=None):
+  '''
+  Ciphertexts of Lambda-sets (shape = (len(actives), 256, 16)) with one vectorized call
+  '''
+  m = lambda_sets(actives, rand)
+  return cipher.encrypt_many(m.reshape(-1, 16)).reshape(m.shape)
+
+def balanced_guesses(ct):
+  '''
+  ret[i, j, k] = True iff XOR_x SBoxInv(ct[i, x, j] ^ k) = 0 (k is a candidate of the last round key byte j)
+  '''
+  k = np.arange(256, dtype=np.uint8)
+  # shape = (sets, 256 texts, 16 bytes, 256 guesses)
+  t = SBOX_INV_NP[ct[:, :, :, None] ^ k]
+  return np.bitwise_xor.reduce(t, axis=1) == 0
+
+def integral_attack(cipher, sets_per_call=2, max_sets=16, rand=None):
+  '''
+  Recover the last round key of 4-round AES-128 (`cipher` must have `encrypt_many`)
+
+  Args:
+    cipher        : 4-round AES128 (oracle)
+    sets_per_call : (optional) number of Lambda-sets encrypted at once
+    max_sets      : (optional) maximum number of Lambda-sets
+    rand          : (optional) numpy.random.RandomState
+
+  Returns:
+    (list of candidates of each byte, number of used Lambda-sets)
+  '''
+  cand = np.ones((16, 256), dtype=bool)
+  used = 0
+  while used < max_sets and (cand.sum(axis=1) > 1).any():
+    n = min(sets_per_call, max_sets - used)
+    # use a different active byte for each set
+    actives = [(used + i) % 16 for i in xrange(n)]
+    cand &= balanced_guesses(collect_many(cipher, actives, rand)).all(axis=0)
+    used += n
+  return [np.flatnonzero(c).tolist() for c in cand], used
+
+def recover_key(cipher, schedule=True, rand=None):
+  '''
+  Recover the master key (schedule = True) or the key (schedule = False) of 4-round AES-128
+
+  Returns:
+    key, or None if some byte has no unique candidate
+  '''
+  cand, used = integral_attack(cipher, rand=rand)
+  if any(len(c) != 1 for c in cand):
+    return None
+  k = [c[0] for c in cand]
+  return invert_key_schedule(k, 4) if schedule else k
+
+def main():
+  rand = np.random.RandomState()
+  for schedule in [False, True]:
+    start = time.time()
+    success = 0
+    for _ in xrange(100):
+      key = map(ord, os.urandom(16))
+      cipher = AES128(4, key, schedule)
+      success += recover_key(cipher, schedule, rand) == key
+    print '[+] schedule = %s: %d / 100 keys recovered, %.3f sec/key' % (schedule, success, (time.time() - start) / 100)
+
+if __name__ == '__main__':
+  main()
+
+'''
+> time python integral_attack.py
+[+] schedule = False: 100 / 100 keys recovered, 0.019 sec/key
+[+] schedule = True: 100 / 100 keys recovered, 0.018 sec/key
+
+real    0m4.033s
+user    0m3.274s
+sys     0m0.576s
+'''
@@ -1,6 +1,13 @@
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
+# ROT2[t] = t <<< 2
+ROT2 = [((t << 2) & (2**8-1)) | t >> (8-2) for t in xrange(256)]
+
 def G(x, a, b):
-  t = (a + b + x) % 256
-  return ((t << 2) & (2**8-1)) | t >> (8-2)
+  return ROT2[(a + b + x) % 256]
 
 def round_function(x):
   a, b, c, d = x
@@ -12,6 +19,35 @@ def round_function(x):
   d = G(1, d, c)
   return [a, b, c, d]
 
+def pack(x):
+  '''
+  [a, b, c, d] -> 0xaabbccdd (big endian: also for 8-byte blocks)
+  '''
+  ret = 0
+  for t in x:
+    ret = (ret << 8) | t
+  return ret
+
+def unpack(x, length=4):
+  return [(x >> (8 * (length - i - 1))) & 0xff for i in xrange(length)]
+
+if np is not None:
+  ROT2_NP = np.array(ROT2, dtype=np.uint8)
+
+  def round_function_many(x):
+    '''
+    round_function on uint32 array `x` (packed by `pack`)
+    '''
+    x = np.asarray(x, dtype=np.uint32)
+    a, b, c, d = [((x >> (24 - 8 * i)) & 0xff).astype(np.uint8) for i in xrange(4)]
+    one = np.uint8(1)
+    # uint8 addition wraps modulo 256
+    b = ROT2_NP[(a ^ b) + (c ^ d) + one]
+    c = ROT2_NP[(c ^ d) + b]
+    a = ROT2_NP[a + b]
+    d = ROT2_NP[d + c + one]
+    return (a.astype(np.uint32) << 24) | (b.astype(np.uint32) << 16) | (c.astype(np.uint32) << 8) | d
+
 def XOR(a, b):
   assert len(a) == len(b)
   return map(lambda x: x[0] ^ x[1], zip(a, b))
@@ -46,6 +82,37 @@ class FEAL(object):
     L = XOR(L, s.keys[s.r])
     return L + R
 
+  def encrypt_many(s, m):
+    '''
+    Encrypt uint64 array of blocks (packed by `pack`) at once (requires NumPy)
+    '''
+    assert np is not None, 'NumPy is required'
+    K = [np.uint32(pack(k)) for k in s.keys]
+    m = np.asarray(m, dtype=np.uint64)
+    L = (m >> np.uint64(32)).astype(np.uint32) ^ K[s.r]
+    R = (m & np.uint64(0xffffffff)).astype(np.uint32) ^ K[s.r + 1] ^ L
+    for ROUND in xrange(s.r):
+      L, R = R, L ^ round_function_many(R ^ K[ROUND])
+    R ^= L
+    return (L.astype(np.uint64) << np.uint64(32)) | R
+
+  def decrypt_many(s, m):
+    '''
+    Decrypt uint64 array of blocks (packed by `pack`) at once (requires NumPy)
+    '''
+    assert np is not None, 'NumPy is required'
+    K = [np.uint32(pack(k)) for k in s.keys]
+    m = np.asarray(m, dtype=np.uint64)
+    L = (m >> np.uint64(32)).astype(np.uint32)
+    R = (m & np.uint64(0xffffffff)).astype(np.uint32) ^ L
+    L, R = R, L
+    for ROUND in xrange(s.r):
+      L, R = R, L ^ round_function_many(R ^ K[s.r - ROUND - 1])
+    L, R = R, L
+    R ^= K[s.r + 1] ^ L
+    L ^= K[s.r]
+    return (L.astype(np.uint64) << np.uint64(32)) | R
+
 if __name__ == '__main__':
   k = [
       [0xde, 0xad, 0xbe, 0xef],
@@ -59,4 +126,8 @@ if __name__ == '__main__':
   m = [0xab, 0xcd, 0xef, 0x90, 0x12, 0x34, 0x56, 0x78]
   c = cipher.encrypt(m)
   assert cipher.decrypt(c) == m
+  if np is not None:
+    c_many = cipher.encrypt_many([pack(m)])
+    assert unpack(int(c_many[0]), 8) == c
+    assert cipher.decrypt_many(c_many)[0] == pack(m)
 
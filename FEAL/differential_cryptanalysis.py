@@ -1,56 +1,21 @@
-from collections import namedtuple, defaultdict
-from FEAL import FEAL, XOR, round_function
-from multiprocessing import Process, Queue
-import itertools
+from FEAL import FEAL, XOR
+from key_search import search_subkeys_parallel
+from pair_store import PairStore, DifferentialPair
 import os
 
-DifferentialPair = namedtuple('DifferentialPair', ['m1', 'm2', 'c1', 'c2'])
-
 def gen_random_bytes(length):
   return map(ord, os.urandom(length))
 
 def make_diff_pair(num, cipher, diff):
-  ret = []
-  for i in xrange(num):
-    m1 = gen_random_bytes(8)
-    m2 = XOR(m1, diff)
-    c1 = cipher.encrypt(m1)
-    c2 = cipher.encrypt(m2)
-    ret += [DifferentialPair(m1, m2, c1, c2)]
-  return ret
-
-def search_inner(k_cand_base, pairs, delta, queue):
-  for k_cand_3 in range(64):
-    for k_cand_base2 in itertools.product(range(256), repeat=3):
-      score = 0
-      k_cand = [16*k_cand_base[0] + k_cand_3, k_cand_base2[0], k_cand_base2[1], k_cand_base2[2]]
-      for pair in pairs:
-        L1, R1 = pair.c1[:4], pair.c1[4:]
-        L2, R2 = pair.c2[:4], pair.c2[4:]
-        diff1 = round_function(XOR(R1, k_cand))
-        diff2 = round_function(XOR(R2, k_cand))
-        outDiff = XOR(XOR(L1, L2), delta)
-        diff = XOR(diff1, diff2)
-        if diff == outDiff:
-          score += 1
-        else:
-          break
-      if score == len(pairs):
-        print '[+] Found key: %r' % (k_cand, )
-        queue.put(k_cand)
-        return
+  return PairStore.make(num, cipher, diff)
 
-def search_round_delta(pairs, delta):
+def search_round_delta(pairs, delta, processes=None):
   print '[+] Searching subkey which has difference %r...' % delta
-  q = Queue()
-  processes = []
-  for k_cand_base1 in range(4):
-    p = Process(target=search_inner, args=([k_cand_base1], pairs, delta, q))
-    p.start()
-  processes += [p]
-  k_cand = q.get(True)
-  for p in processes:
-    p.terminate()
+  keys = search_subkeys_parallel(pairs, delta, processes)
+  if len(keys) == 0:
+    return None
+  k_cand = keys[0]
+  print '[+] Found key: %r (%d candidates)' % (k_cand, len(keys))
   return k_cand
 
 def search_first(pairs):
@@ -69,28 +34,10 @@ def search_first(pairs):
 
 
 def round_inverse(pairs, k):
-  ret = []
-  for pair in pairs:
-    L1, R1 = pair.c1[:4], pair.c1[4:]
-    L2, R2 = pair.c2[:4], pair.c2[4:]
-    L1 = XOR(round_function(XOR(R1, k)), L1)
-    L2 = XOR(round_function(XOR(R2, k)), L2)
-    c1 = R1 + L1
-    c2 = R2 + L2
-    ret += [DifferentialPair(pair.m1, pair.m2, c1, c2)]
-  return ret
+  return pairs.round_inverse(k)
 
 def inverse_last(pairs):
-  ret = []
-  for pair in pairs:
-    L1, R1 = pair.c1[:4], pair.c1[4:]
-    L2, R2 = pair.c2[:4], pair.c2[4:]
-    R1 = XOR(L1, R1)
-    R2 = XOR(L2, R2)
-    c1 = R1 + L1
-    c2 = R2 + L2
-    ret += [DifferentialPair(pair.m1, pair.m2, c1, c2)]
-  return ret
+  return pairs.inverse_last()
 
 def main():
   k = [gen_random_bytes(4) for _ in xrange(4 + 2)]
@@ -0,0 +1,215 @@
+from FEAL import ROT2, pack
+from pair_store import PairStore
+from multiprocessing import Process, Queue, cpu_count
+from Queue import Empty
+import numpy as np
+import time
+
+'''
+Fast round subkey search for differential cryptanalysis of FEAL
+
+We search k such that F(R1 ^ k) ^ F(R2 ^ k) = L1 ^ L2 ^ delta for all pairs.
+Round function F([a, b, c, d]) = [f0, f1, f2, f3] is
+  f1 = G1(a ^ b, c ^ d), f2 = G0(c ^ d, f1), f0 = G0(a, f1), f3 = G1(d, f2)
+so the middle bytes f1, f2 depend only on u = k0 ^ k1 and v = k2 ^ k3 (2^16 candidates),
+and for each (u, v), f0 depends only on k0 and f3 depends only on k3 (2^8 candidates each).
+Then the 2^32 space is searched in 2^16 + (number of survivors) * 2^9 steps.
+
+Candidates are checked with NumPy against many pairs at once, using 256x256 tables of G, and
+a candidate is dropped as soon as a pair rejects it (the pairs are checked in blocks).
+
+`search_subkeys_parallel` splits the middle candidates into chunks and runs them over a pool of processes.
+'''
+
+# G0[a, b] = G(0, a, b), G1[a, b] = G(1, a, b)
+G0 = np.array([[ROT2[(a + b) % 256] for b in xrange(256)] for a in xrange(256)], dtype=np.uint8)
+G1 = np.array([[ROT2[(a + b + 1) % 256] for b in xrange(256)] for a in xrange(256)], dtype=np.uint8)
+
+# number of (candidate, pair) checks per NumPy operation
+BLOCK_SIZE = 2**20
+
+def byte(x, i):
+  '''
+  i-th byte (from the most significant byte) of uint32 array x
+  '''
+  return ((x >> (24 - 8 * i)) & 0xff).astype(np.uint8)
+
+def pair_arrays(pairs, delta):
+  '''
+  Pack right halves of ciphertexts and expected output differences into uint32 arrays
+
+  Returns:
+    (R1, R2, D) where D = L1 ^ L2 ^ delta
+  '''
+  if isinstance(pairs, PairStore):
+    L1, R1, L2, R2 = pairs.halves()
+    return R1, R2, L1 ^ L2 ^ np.uint32(pack(delta))
+  R1 = np.array([pack(p.c1[4:]) for p in pairs], dtype=np.uint32)
+  R2 = np.array([pack(p.c2[4:]) for p in pairs], dtype=np.uint32)
+  D = np.array([pack(p.c1[:4]) ^ pack(p.c2[:4]) for p in pairs], dtype=np.uint32) ^ np.uint32(pack(delta))
+  return R1, R2, D
+
+def middle(x, u, v):
+  '''
+  (f1, f2) of F(x ^ k) where u = k0 ^ k1, v = k2 ^ k3 (arrays are broadcasted)
+  '''
+  t = byte(x, 2) ^ byte(x, 3) ^ v
+  f1 = G1[byte(x, 0) ^ byte(x, 1) ^ u, t]
+  f2 = G0[t, f1]
+  return f1, f2
+
+def search_middle(R1, R2, D, lo=0, hi=2**16):
+  '''
+  Search (u, v) such that the middle bytes of the output differences match for all pairs
+
+  Args:
+    R1, R2, D : arrays of `pair_arrays`
+    lo, hi    : search candidates w = u * 256 + v in [lo, hi)
+
+  Returns:
+    list of (u, v)
+  '''
+  w = np.arange(lo, hi, dtype=np.uint32)
+  u = (w >> 8).astype(np.uint8)
+  v = (w & 0xff).astype(np.uint8)
+  D1, D2 = byte(D, 1), byte(D, 2)
+  i = 0
+  while i < len(R1) and len(u) > 0:
+    # check the next `size` pairs for each candidate: shape = (candidates, pairs)
+    size = max(1, BLOCK_SIZE // len(u))
+    x1, x2 = R1[None, i:i + size], R2[None, i:i + size]
+    a1, b1 = middle(x1, u[:, None], v[:, None])
+    a2, b2 = middle(x2, u[:, None], v[:, None])
+    ok = (((a1 ^ a2) == D1[None, i:i + size]) & ((b1 ^ b2) == D2[None, i:i + size])).all(axis=1)
+    u, v = u[ok], v[ok]
+    i += size
+  return zip(u.tolist(), v.tolist())
+
+def search_byte(G, x1, x2, f1, f2, d):
+  '''
+  Search k such that G(x1 ^ k, f1) ^ G(x2 ^ k, f2) = d for all pairs (G is table G0 or G1)
+  '''
+  k = np.arange(256, dtype=np.uint8)
+  i = 0
+  while i < len(x1) and len(k) > 0:
+    size = max(1, BLOCK_SIZE // len(k))
+    t = k[:, None]
+    ok = ((G[x1[None, i:i + size] ^ t, f1[None, i:i + size]] ^ G[x2[None, i:i + size] ^ t, f2[None, i:i + size]]) == d[None, i:i + size]).all(axis=1)
+    k = k[ok]
+    i += size
+  return k.tolist()
+
+def search_outer(R1, R2, D, u, v):
+  '''
+  Search subkeys k = [k0, k1, k2, k3] such that k0 ^ k1 = u, k2 ^ k3 = v and all pairs satisfy the differential
+
+  Returns:
+    list of subkeys
+  '''
+  f1_1, f2_1 = middle(R1, u, v)
+  f1_2, f2_2 = middle(R2, u, v)
+  # f0 = G0(a ^ k0, f1)
+  k0s = search_byte(G0, byte(R1, 0), byte(R2, 0), f1_1, f1_2, byte(D, 0))
+  if len(k0s) == 0:
+    return []
+  # f3 = G1(d ^ k3, f2)
+  k3s = search_byte(G1, byte(R1, 3), byte(R2, 3), f2_1, f2_2, byte(D, 3))
+  return [[k0, k0 ^ u, k3 ^ v, k3] for k0 in k0s for k3 in k3s]
+
+def search_subkeys(pairs, delta, lo=0, hi=2**16):
+  '''
+  All subkeys k such that F(R1 ^ k) ^ F(R2 ^ k) = L1 ^ L2 ^ delta for all pairs (sorted)
+
+  Args:
+    pairs     : PairStore or list of DifferentialPair (c1 = L1 + R1, c2 = L2 + R2)
+    delta     : expected output difference of the round
+    lo, hi    : (optional) range of the middle candidates (see `search_middle`)
+  '''
+  R1, R2, D = pair_arrays(pairs, delta)
+  ret = []
+  for u, v in search_middle(R1, R2, D, lo, hi):
+    ret += search_outer(R1, R2, D, u, v)
+  return sorted(ret)
+
+def search_worker(R1, R2, D, tasks, results):
+  while True:
+    chunk = tasks.get()
+    if chunk is None:
+      return
+    lo, hi = chunk
+    keys = []
+    for u, v in search_middle(R1, R2, D, lo, hi):
+      keys += search_outer(R1, R2, D, u, v)
+    results.put((chunk, sorted(keys)))
+
+def search_subkeys_parallel(pairs, delta, processes=None, chunks_per_process=8, report_interval=10.0):
+  '''
+  `search_subkeys` over a pool of worker processes
+
+  The 2^16 middle candidates are split into `processes` * `chunks_per_process` chunks, and each worker
+  takes the next chunk when it finishes one. All workers are terminated at the first chunk which has subkeys.
+  (The subkeys of one (u, v) are in the same chunk, so the result does not depend on the scheduling
+  unless two (u, v) survive.)
+
+  Args:
+    pairs              : PairStore or list of DifferentialPair
+    delta              : expected output difference of the round
+    processes          : (optional) number of worker processes (default: number of CPUs)
+    chunks_per_process : (optional) number of chunks per process
+    report_interval    : (optional) print progress every `report_interval` seconds
+
+  Returns:
+    sorted list of subkeys of the first hit, or [] if the whole space is exhausted
+  '''
+  if processes is None:
+    processes = cpu_count()
+  R1, R2, D = pair_arrays(pairs, delta)
+  N = 2**16
+  num_chunks = min(N, processes * chunks_per_process)
+  bounds = [N * i // num_chunks for i in xrange(num_chunks + 1)]
+  tasks = Queue()
+  for i in xrange(num_chunks):
+    tasks.put((bounds[i], bounds[i + 1]))
+  for _ in xrange(processes):
+    tasks.put(None)
+  results = Queue()
+  workers = [Process(target=search_worker, args=(R1, R2, D, tasks, results)) for _ in xrange(processes)]
+  for p in workers:
+    p.daemon = True
+    p.start()
+  start = time.time()
+  last_report = start
+  # number of searched middle candidates (each of them covers 2^16 subkeys)
+  searched = 0
+  done = 0
+  result = []
+
+  def report():
+    elapsed = max(time.time() - start, 1e-6)
+    print '[+] %d / %d chunks, %.2f sec, %.3g candidates/sec' % (done, num_chunks, elapsed, searched * 2**16 / elapsed)
+
+  try:
+    while done < num_chunks:
+      try:
+        (lo, hi), keys = results.get(True, 1.0)
+      except Empty:
+        if any(p.exitcode not in (None, 0) for p in workers):
+          raise RuntimeError('Worker process died')
+        keys = None
+      if keys is not None:
+        searched += hi - lo
+        done += 1
+        if len(keys) > 0:
+          result = keys
+          break
+      if time.time() - last_report > report_interval:
+        report()
+        last_report = time.time()
+    else:
+      print '[-] Search space exhausted'
+  finally:
+    for p in workers:
+      p.terminate()
+      p.join()
+  report()
+  return result
@@ -0,0 +1,76 @@
+from collections import namedtuple
+from FEAL import pack, unpack, round_function_many
+import numpy as np
+import os
+
+'''
+Differential pairs of FEAL kept as packed arrays
+
+Plaintexts are uint64 arrays (see `FEAL.pack`), and ciphertexts are kept as uint32 arrays of their halves.
+Partial decryptions (`inverse_last`, `round_inverse`) are not materialized: they return a new store which
+shares the arrays and has one more stage, and the stages are applied (vectorized) when `halves` is called.
+'''
+
+DifferentialPair = namedtuple('DifferentialPair', ['m1', 'm2', 'c1', 'c2'])
+
+def random_blocks(num):
+  '''
+  uint64 array of `num` random blocks (with one call of os.urandom)
+  '''
+  return np.frombuffer(os.urandom(8 * num), dtype=np.uint64).copy()
+
+class PairStore(object):
+  def __init__(s, M1, M2, C1, C2, stages=()):
+    s.M1 = M1
+    s.M2 = M2
+    s.C1 = C1
+    s.C2 = C2
+    # each stage is None (`inverse_last`) or packed subkey (`round_inverse`)
+    s.stages = tuple(stages)
+    s.cache = None
+
+  @staticmethod
+  def make(num, cipher, diff):
+    '''
+    `num` pairs (m1, m1 ^ diff) of random plaintexts and their ciphertexts
+    '''
+    M1 = random_blocks(num)
+    M2 = M1 ^ np.uint64(pack(diff))
+    return PairStore(M1, M2, cipher.encrypt_many(M1), cipher.encrypt_many(M2))
+
+  def __len__(s):
+    return len(s.M1)
+
+  def halves(s):
+    '''
+    (L1, R1, L2, R2) after all stages (uint32 arrays)
+    '''
+    if s.cache is None:
+      mask = np.uint64(0xffffffff)
+      L1, R1 = (s.C1 >> np.uint64(32)).astype(np.uint32), (s.C1 & mask).astype(np.uint32)
+      L2, R2 = (s.C2 >> np.uint64(32)).astype(np.uint32), (s.C2 & mask).astype(np.uint32)
+      for k in s.stages:
+        if k is None:
+          # (L, R) -> (L ^ R, L)
+          L1, R1 = L1 ^ R1, L1
+          L2, R2 = L2 ^ R2, L2
+        else:
+          # (L, R) -> (R, L ^ F(R ^ k))
+          L1, R1 = R1, L1 ^ round_function_many(R1 ^ k)
+          L2, R2 = R2, L2 ^ round_function_many(R2 ^ k)
+      s.cache = (L1, R1, L2, R2)
+    return s.cache
+
+  def inverse_last(s):
+    return PairStore(s.M1, s.M2, s.C1, s.C2, s.stages + (None, ))
+
+  def round_inverse(s, k):
+    return PairStore(s.M1, s.M2, s.C1, s.C2, s.stages + (np.uint32(pack(k)), ))
+
+  def __getitem__(s, i):
+    '''
+    i-th pair as DifferentialPair of byte lists
+    '''
+    L1, R1, L2, R2 = s.halves()
+    return DifferentialPair(unpack(int(s.M1[i]), 8), unpack(int(s.M2[i]), 8),
+                            unpack(int(L1[i])) + unpack(int(R1[i])), unpack(int(L2[i])) + unpack(int(R2[i])))
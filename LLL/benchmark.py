@@ -0,0 +1,154 @@
+from __future__ import print_function, division
+from vector import Vector
+from lattice import IntegerLattice, LLL, naive_LLL, integral_LLL, fp_LLL, is_LLL_basis
+from bkz import BKZ, root_hermite_factor
+import random
+import time
+
+def knapsack_lattice(n, bits, rand):
+  '''
+  n x (n + 1) knapsack-like lattice: [I_n | a] where a_i is a random `bits`-bit integer
+  '''
+  basis = []
+  for i in range(n):
+    basis += [Vector([int(i == j) for j in range(n)] + [rand.getrandbits(bits)])]
+  return IntegerLattice(basis)
+
+def howgrave_graham_lattice(Nbits, d, h, rand):
+  '''
+  Howgrave-Graham's lattice for random monic f(x) of degree `d` modulo `Nbits`-bit N:
+  rows are coefficient vectors of N^(h-1-v) * x^u * f(x)^v (xX)
+  '''
+  def mul(f, g):
+    ret = [0] * (len(f) + len(g) - 1)
+    for i, a in enumerate(f):
+      for j, b in enumerate(g):
+        ret[i + j] += a * b
+    return ret
+  N = rand.getrandbits(Nbits) | 1
+  f = [rand.randrange(N) for _ in range(d)] + [1]
+  X = 2**(Nbits // (2 * d))
+  n = h * d
+  basis = []
+  fv = [1]
+  for v in range(h):
+    for u in range(d):
+      g = [0] * u + [c * N**(h - 1 - v) for c in fv]
+      g += [0] * (n - len(g))
+      basis += [Vector([g[j] * X**j for j in range(n)])]
+    fv = mul(fv, f)
+  return IntegerLattice(basis)
+
+def qary_lattice(n, k, q, rand):
+  '''
+  n-dimensional q-ary lattice: [[q * I_k, 0], [A, I_{n-k}]] where A is a random (n-k) x k matrix over Z/qZ
+  '''
+  basis = []
+  for i in range(k):
+    basis += [Vector([q * int(i == j) for j in range(n)])]
+  for i in range(k, n):
+    basis += [Vector([rand.randrange(q) for _ in range(k)] + [int(i == j) for j in range(k, n)])]
+  return IntegerLattice(basis)
+
+def measure(f, L, delta):
+  t = time.time()
+  ret = f(L, delta)
+  return time.time() - t, ret
+
+def main():
+  rand = random.Random(0x1234)
+  delta = 3/4
+  print('[+] knapsack lattice')
+  print('dim  bits  integral_LLL[s]  fp_LLL[s]  naive_LLL[s]')
+  for bits in [16, 64, 256]:
+    for n in [5, 10, 20, 30, 40, 50, 60]:
+      L = knapsack_lattice(n, bits, rand)
+      t_int, R = measure(integral_LLL, L, delta)
+      assert is_LLL_basis(R, delta)
+      t_fp, _ = measure(fp_LLL, L, delta)
+      # naive_LLL is too slow to measure at higher dimensions
+      if n <= 10 and bits <= 16:
+        t_naive, _ = measure(naive_LLL, L, delta)
+        t_naive = '{:.4f}'.format(t_naive)
+      else:
+        t_naive = '-'
+      print('{:<4} {:<5} {:<16.4f} {:<10.4f} {}'.format(n, bits, t_int, t_fp, t_naive))
+
+  print('[+] Howgrave-Graham lattice')
+  print('dim  bits   integral_LLL[s]  fp_LLL[s]')
+  for Nbits, d, h in [(128, 3, 3), (256, 3, 3), (256, 3, 4), (512, 3, 4), (1024, 3, 5), (2048, 3, 6)]:
+    L = howgrave_graham_lattice(Nbits, d, h, rand)
+    bits = max(abs(x).bit_length() for v in L.basis for x in v)
+    t_fp, R = measure(fp_LLL, L, delta)
+    # integral_LLL is too slow for large entries
+    if Nbits <= 512:
+      t_int, _ = measure(integral_LLL, L, delta)
+      t_int = '{:.4f}'.format(t_int)
+    else:
+      t_int = '-'
+    print('{:<4} {:<6} {:<16} {:.4f}'.format(d * h, bits, t_int, t_fp))
+
+  print('[+] BKZ vs LLL (q-ary lattice, q = 2^30 + 3)')
+  print('dim  algorithm  time[s]   root-Hermite factor')
+  for n in [30, 40, 50]:
+    L = qary_lattice(n, n // 2, 2**30 + 3, rand)
+    t, R = measure(LLL, L, delta)
+    print('{:<4} {:<10} {:<9.4f} {:.5f}'.format(n, 'LLL', t, root_hermite_factor(R)))
+    for block_size in [5, 10, 20]:
+      t = time.time()
+      R = BKZ(L, block_size, delta)
+      t = time.time() - t
+      print('{:<4} {:<10} {:<9.4f} {:.5f}'.format(n, 'BKZ-{}'.format(block_size), t, root_hermite_factor(R)))
+
+if __name__ == '__main__':
+  main()
+
+
+'''
+> python3 benchmark.py
+[+] knapsack lattice
+dim  bits  integral_LLL[s]  fp_LLL[s]  naive_LLL[s]
+5    16    0.0005           0.0005     0.0167
+10   16    0.0010           0.0024     0.4728
+20   16    0.0026           0.0093     -
+30   16    0.0058           0.0149     -
+40   16    0.0092           0.0233     -
+50   16    0.0137           0.0345     -
+60   16    0.0262           0.0527     -
+5    64    0.0006           0.0013     -
+10   64    0.0023           0.0056     -
+20   64    0.0124           0.0335     -
+30   64    0.0293           0.0859     -
+40   64    0.0433           0.1306     -
+50   64    0.0580           0.1961     -
+60   64    0.0949           0.2184     -
+5    256   0.0025           0.0041     -
+10   256   0.0118           0.0266     -
+20   256   0.0919           0.1300     -
+30   256   0.2114           0.4181     -
+40   256   0.4036           1.1892     -
+50   256   0.7042           1.6464     -
+60   256   1.0841           2.9605     -
+[+] Howgrave-Graham lattice
+dim  bits   integral_LLL[s]  fp_LLL[s]
+9    381    0.1744           0.0345
+9    756    0.9620           0.0848
+12   1100   15.0687          0.6352
+12   2207   91.6715          1.7364
+15   5791   -                12.8251
+18   14302  -                121.4167
+[+] BKZ vs LLL (q-ary lattice, q = 2^30 + 3)
+dim  algorithm  time[s]   root-Hermite factor
+30   LLL        0.6684    1.01951
+30   BKZ-5      1.6703    1.01244
+30   BKZ-10     1.3951    1.01264
+30   BKZ-20     1.8154    1.01244
+40   LLL        2.3745    1.02325
+40   BKZ-5      8.0681    1.01374
+40   BKZ-10     9.5923    1.01274
+40   BKZ-20     6.3539    1.01274
+50   LLL        6.2044    1.02120
+50   BKZ-5      27.2899   1.01533
+50   BKZ-10     31.4748   1.01306
+50   BKZ-20     49.0979   1.01284
+'''
@@ -0,0 +1,168 @@
+from __future__ import print_function, division
+from lattice import IntegerLattice, LLL
+from matrix import BasisMatrix
+import math
+
+'''
+BKZ (Block Korkine-Zolotarev) reduction
+
+References:
+  * C. P. Schnorr and M. Euchner. 1994. "Lattice Basis Reduction: Improved Practical Algorithms and Solving Subset Sum Problems"
+  * Guillaume Hanrot, Xavier Pujol, and Damien Stehle. 2011. "Analyzing Blockwise Lattice Algorithms using Dynamical Systems"
+'''
+
+def gram_schmidt_float(b):
+  '''
+  Gram-Schmidt coefficients (mu, B) of BasisMatrix `b` in floating-point, where B[i] = ||b_i*||^2 / scale.
+
+  Inner products are exact, and they are scaled down by a power of 2 (`scale`) not to overflow.
+
+  Returns:
+    (mu, B, scale)
+  '''
+  n = len(b)
+  G = [[b.inner_product(i, j) for j in range(i + 1)] for i in range(n)]
+  bits = max(G[i][i].bit_length() for i in range(n))
+  scale = 2**max(0, bits - 1000)
+  mu = [[0.0] * n for _ in range(n)]
+  B = [0.0] * n
+  r = [[0.0] * n for _ in range(n)]
+  for i in range(n):
+    ri, mui = r[i], mu[i]
+    for j in range(i + 1):
+      t = G[i][j] / scale
+      for k in range(j):
+        t -= mu[j][k] * ri[k]
+      ri[j] = t
+      if j < i:
+        mui[j] = t / B[j]
+    B[i] = ri[i]
+    mui[i] = 1.0
+  return mu, B, scale
+
+def root_hermite_factor(L):
+  '''
+  Root-Hermite factor (||b_0|| / vol(L)^(1/n))^(1/n) of lattice basis `L`
+  '''
+  b = L.to_matrix()
+  n = len(b)
+  _, B, scale = gram_schmidt_float(b)
+  log_vol = sum(math.log(x) + math.log(scale) for x in B) / 2
+  log_b0 = math.log(b.norm2(0)) / 2
+  return math.exp((log_b0 - log_vol / n) / n)
+
+def enumerate_svp(mu, B, radius):
+  '''
+  Schnorr-Euchner enumeration of the shortest nonzero vector in the lattice which has Gram-Schmidt coefficients (mu, B).
+
+  Args:
+    mu     : Gram-Schmidt coefficients (mu[i][j] for j < i)
+    B      : squared norms of Gram-Schmidt vectors
+    radius : search only vectors of squared norm < radius
+
+  Returns:
+    (coefficients, squared norm) of the shortest vector, or (None, radius) if there is no vector shorter than radius
+  '''
+  m = len(B)
+  x = [0] * m
+  c = [0.0] * m
+  l = [0.0] * (m + 1)
+  dx = [0] * m
+  ddx = [0] * m
+  best = None
+  x[0] = 1
+  i = 0
+  while True:
+    y = x[i] - c[i]
+    li = l[i + 1] + y * y * B[i]
+    if li < radius:
+      if i > 0:
+        # go down the tree
+        i -= 1
+        l[i + 1] = li
+        c[i] = -sum(x[t] * mu[t][i] for t in range(i + 1, m))
+        x[i] = int(math.floor(c[i] + 0.5))
+        dx[i] = 0
+        ddx[i] = 1 if c[i] >= x[i] else -1
+        continue
+      elif li > 0:
+        radius = li
+        best = list(x)
+    else:
+      # go up the tree
+      i += 1
+      if i == m:
+        return best, radius
+    if l[i + 1] != 0:
+      # zig-zag around the center: x, x + 1, x - 1, x + 2, ...
+      dx[i] = ddx[i] - dx[i]
+      ddx[i] = -ddx[i]
+      x[i] += dx[i]
+    else:
+      # all of upper coefficients are 0: enumerate only positive x[i] (skip -v)
+      x[i] += 1
+
+def insert_vector(b, j, u):
+  '''
+  Transform BasisMatrix `b` with unimodular row operations so that b[j] = +-sum_i u[i] * b[j + i].
+  `u` must be primitive (gcd(u) = 1), which holds for the coefficients of a shortest vector.
+  '''
+  u = list(u)
+  for i in range(len(u) - 1, 0, -1):
+    # Euclidean algorithm on (u[i - 1], u[i]) moves the coefficient of b[j + i] to b[j + i - 1]
+    while u[i] != 0:
+      q = u[i - 1] // u[i]
+      # u[i - 1] * b[j + i - 1] + u[i] * b[j + i] = (u[i - 1] - q * u[i]) * b[j + i - 1] + u[i] * (b[j + i] + q * b[j + i - 1])
+      b.sub_mult_row(j + i, j + i - 1, -q)
+      u[i - 1] -= q * u[i]
+      b.swap_rows(j + i, j + i - 1)
+      u[i - 1], u[i] = u[i], u[i - 1]
+  assert abs(u[0]) == 1, 'coefficients must be primitive'
+
+def BKZ(L, block_size, delta=3/4, max_tours=None, callback=None, method='integral'):
+  '''
+  BKZ reduction with Schnorr-Euchner enumeration as the SVP oracle.
+
+  Args:
+    L          : IntegerLattice
+    block_size : block size (block_size = 2 is same as LLL)
+    delta      : parameter of LLL which is called after each insertion
+    max_tours  : (optional) early abort - stop after `max_tours` tours even if the basis is still improving
+    callback   : (optional) function called as callback(tour, L) after each tour.
+                 If it returns True, reduction is aborted.
+    method     : LLL method (see `LLL`)
+
+  Returns:
+    BKZ-reduced IntegerLattice
+  '''
+  if block_size < 2:
+    raise ValueError('Block size must be greater than 1.')
+  L = LLL(L, delta, method)
+  n = len(L.basis)
+  b = L.to_matrix()
+  tour = 0
+  while max_tours is None or tour < max_tours:
+    tour += 1
+    changed = False
+    mu, B, _ = gram_schmidt_float(b)
+    for j in range(n - 1):
+      k = min(j + block_size, n)
+      mu_block = [row[j:k] for row in mu[j:k]]
+      # 0.99: skip tiny improvements (and ones which may be caused by rounding error)
+      u, _ = enumerate_svp(mu_block, B[j:k], 0.99 * B[j])
+      if u is None:
+        continue
+      insert_vector(b, j, u)
+      # Only b_0, ..., b_{k-1} are changed and they span the same space as before,
+      # so LLL on them is enough to remove the linear dependency of the block
+      b.rows[:k] = LLL(IntegerLattice.from_matrix(BasisMatrix(b.rows[:k])), delta, method).to_matrix().rows
+      mu, B, _ = gram_schmidt_float(b)
+      changed = True
+    # size-reduce the rows after the changed blocks
+    L = LLL(IntegerLattice.from_matrix(b), delta, method)
+    b = L.to_matrix()
+    if callback is not None and callback(tour, L):
+      break
+    if not changed:
+      break
+  return IntegerLattice.from_matrix(b)
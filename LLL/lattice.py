@@ -1,6 +1,7 @@
 from __future__ import division
 from fractions import Fraction
-from vector import Vector
+from vector import Vector, INTEGER_TYPES
+from matrix import BasisMatrix
 import unittest
 
 def gcd(a, b):
@@ -19,7 +20,7 @@ class IntegerLattice:
       raise ValueError("A lattice basis must be a list of instance of Vector.")
     if not all(len(v) == len(s.basis[0]) for v in s.basis):
       raise ValueError("All lattice basis must have the same size.")
-    if not all(all(isinstance(x, int) for x in v) for v in s.basis):
+    if not all(all(isinstance(x, INTEGER_TYPES) for x in v) for v in s.basis):
       raise ValueError("This class is only implemented a lattice over the Integer ring.")
 
     # Initialize "gcd" vector
@@ -48,12 +49,19 @@ class IntegerLattice:
   def is_point(s, v):
     return all(divmod(x, y)[1] == 0 for x, y in zip(v, s.gcd_vector))
 
+  def to_matrix(s):
+    return BasisMatrix.from_lattice(s)
+
+  @classmethod
+  def from_matrix(cls, M):
+    return cls(M.to_vectors())
+
 def gram_schmidt_orthgonalization(L):
-  bc = (Fraction, int)
+  bc = (Fraction, ) + INTEGER_TYPES
   basis = [Vector(list(x), base_class=bc) for x in L.basis]
   ret = [basis[0]]
   for j in range(1, len(basis)):
-    t = Vector([0 for _ in basis], base_class=bc)
+    t = Vector([0 for _ in basis[0]], base_class=bc)
     for i in range(j):
       t = t.add(ret[i].scalar_mult(Fraction(basis[j].inner_product(ret[i]), ret[i].inner_product(ret[i]))))
     ret += [basis[j].sub(t)]
@@ -63,18 +71,24 @@ def is_LLL_basis(L, delta=3/4):
   n = len(L.basis)
   m = len(L.basis[0])
   gs_basis = gram_schmidt_orthgonalization(L)
+  # Compare with exact squared norms: floating-point norm() misjudges |mu| = 1/2
+  gs_norms = [v.inner_product(v) for v in gs_basis]
+  delta = Fraction(delta)
   for i in range(1, n):
     bi = L.basis[i]
     for j in range(i):
       bj_star = gs_basis[j]
-      if abs(bi.inner_product(bj_star) / (bj_star.norm()**2)) > 1/2:
+      if abs(Fraction(bi.inner_product(bj_star)) / gs_norms[j]) > Fraction(1, 2):
         return False
   for i in range(n - 1):
-    if delta * gs_basis[i].norm()**2 > gs_basis[i+1].norm()**2:
+    if delta * gs_norms[i] > gs_norms[i + 1]:
       return False
   return True
 
-def LLL(L, delta=3/4):
+def naive_LLL(L, delta=3/4):
+  '''
+  Textbook LLL: recompute whole Gram-Schmidt basis after each size-reduction pass and swap
+  '''
   import copy
   import math
   L = copy.deepcopy(L)
@@ -98,3 +112,199 @@ def LLL(L, delta=3/4):
     if return_flag:
       return L
 
+def integral_LLL(L, delta=3/4):
+  '''
+  Integral LLL algorithm (de Weger's variant, cf. H. Cohen. "A Course in Computational Algebraic Number Theory" Algorithm 2.6.7)
+
+  Keeps d_i = prod_{j <= i} ||b_j*||^2 and lambda_{i,j} = d_j * mu_{i,j} as integers and updates them
+  incrementally on size-reduction and swap, so Gram-Schmidt basis is never recomputed.
+  Exchange condition is same as `is_LLL_basis`: delta * ||b_{k-1}*||^2 > ||b_k*||^2.
+  '''
+  delta = Fraction(delta)
+  dn, dd = delta.numerator, delta.denominator
+  b = L.to_matrix()
+  n = len(b)
+  # d[i + 1] = d_i, d[0] = 1
+  d = [1] + [0] * n
+  lam = [[0] * n for _ in range(n)]
+
+  def reduce(k, l):
+    if 2 * abs(lam[k][l]) > d[l + 1]:
+      q = int((2 * lam[k][l] + d[l + 1]) // (2 * d[l + 1]))
+      b.sub_mult_row(k, l, q)
+      lam[k][l] -= q * d[l + 1]
+      lk, ll = lam[k], lam[l]
+      for i in range(l):
+        lk[i] -= q * ll[i]
+
+  def swap(k):
+    b.swap_rows(k, k - 1)
+    lk, lk1 = lam[k], lam[k - 1]
+    for j in range(k - 1):
+      lk[j], lk1[j] = lk1[j], lk[j]
+    l = lk[k - 1]
+    B = (d[k - 1] * d[k + 1] + l * l) // d[k]
+    for i in range(k + 1, kmax + 1):
+      li = lam[i]
+      t = li[k]
+      li[k] = (d[k + 1] * li[k - 1] - l * t) // d[k]
+      li[k - 1] = (B * t + l * li[k]) // d[k + 1]
+    d[k] = B
+
+  d[1] = b.norm2(0)
+  k = 1
+  kmax = 0
+  while k < n:
+    if k > kmax:
+      # Incremental Gram-Schmidt
+      kmax = k
+      for j in range(k + 1):
+        u = b.inner_product(k, j)
+        for i in range(j):
+          u = (d[i + 1] * u - lam[k][i] * lam[j][i]) // d[i]
+        if j < k:
+          lam[k][j] = u
+        else:
+          d[k + 1] = u
+      if d[k + 1] == 0:
+        raise ValueError('A lattice basis must be linearly independent.')
+    reduce(k, k - 1)
+    if dd * d[k + 1] * d[k - 1] < dn * d[k] * d[k]:
+      swap(k)
+      k = max(1, k - 1)
+    else:
+      for l in range(k - 2, -1, -1):
+        reduce(k, l)
+      k += 1
+  return IntegerLattice.from_matrix(b)
+
+def fp_LLL(L, delta=3/4, prec=53):
+  '''
+  Floating-point LLL (Schnorr-Euchner / L^2 style) with exact fallback.
+
+  Basis and its inner products are kept exact, but Gram-Schmidt coefficients are computed
+  with `prec`-bit floating-point numbers: `float` (scaled by a power of 2 to avoid overflow) if it's enough,
+  otherwise `decimal.Decimal` which has unbounded exponent (so works for 2000-bit entries).
+  Exact Gram matrix is updated on each row operation, so inner products are never recomputed.
+  If the precision is lost (size-reduction doesn't converge, ||b_j*||^2 = 0 or too many iterations),
+  the floating-point reduction stops. In both cases the result is passed to `integral_LLL`,
+  which only has to verify it (and fix a few misjudged swaps) if floating-point reduction succeeded.
+  '''
+  import decimal
+  import math
+  from operator import mul
+  b = L.to_matrix()
+  n = len(b)
+  bits = max(abs(x).bit_length() for row in b for x in row)
+  gram_bits = 2 * bits + n.bit_length()
+  if prec <= 53 and gram_bits < 1800:
+    # Gram-Schmidt coefficients mu are scale-invariant, so scale ||b_i*||^2 down into the range of double
+    scale = 2**max(0, gram_bits - 1000)
+    fp = lambda x: x / scale
+    ctx = decimal.getcontext()
+    round_fp = lambda x: int(math.floor(x + 0.5))
+  else:
+    emax = getattr(decimal, 'MAX_EMAX', 999999999)
+    ctx = decimal.Context(prec=int(prec * math.log10(2)) + 1, Emax=emax, Emin=-emax)
+    pow2 = {}
+
+    def fp(x):
+      # Converting a large integer to decimal is slow: convert only top bits of `x`
+      e = abs(x).bit_length() - prec - 8
+      if e <= 0:
+        return ctx.create_decimal(x)
+      if e not in pow2:
+        pow2[e] = ctx.power(2, e)
+      return ctx.multiply(ctx.create_decimal(x >> e), pow2[e])
+
+    half = fp(1) / fp(2)
+    round_fp = lambda x: int((x + half).to_integral_value(rounding=decimal.ROUND_FLOOR))
+  delta = Fraction(delta)
+  max_iter = 8 + bits
+  max_loop = 1000 * n * (n + bits)
+
+  with decimal.localcontext(ctx):
+    delta_fp = fp(delta.numerator) / fp(delta.denominator)
+    zero = fp(0)
+    r = [[zero] * n for _ in range(n)]
+    mu = [[zero] * n for _ in range(n)]
+    G = [[b.inner_product(i, j) for j in range(n)] for i in range(n)]
+
+    def sub_mult(k, j, X):
+      # b_k -= X * b_j
+      b.sub_mult_row(k, j, X)
+      Gk, Gj = G[k], G[j]
+      Gkk = Gk[k] - 2 * X * Gk[j] + X * X * Gj[j]
+      for i in range(n):
+        Gk[i] -= X * Gj[i]
+        G[i][k] = Gk[i]
+      Gk[k] = Gkk
+
+    def swap(k):
+      b.swap_rows(k, k - 1)
+      G[k], G[k - 1] = G[k - 1], G[k]
+      for Gi in G:
+        Gi[k], Gi[k - 1] = Gi[k - 1], Gi[k]
+
+    def gso_row(k):
+      rk, muk, Gk = r[k], mu[k], G[k]
+      for j in range(k + 1):
+        t = fp(Gk[j]) - sum(map(mul, mu[j][:j], rk[:j]), zero)
+        rk[j] = t
+        if j < k:
+          muk[j] = t / r[j][j]
+
+    def size_reduce(k):
+      muk = mu[k]
+      for _ in range(max_iter):
+        gso_row(k)
+        changed = False
+        for j in range(k - 1, -1, -1):
+          X = round_fp(muk[j])
+          if X != 0:
+            sub_mult(k, j, X)
+            muk[:j] = [x - X * y for x, y in zip(muk[:j], mu[j][:j])]
+            changed = True
+        if not changed:
+          return True
+      return False
+
+    try:
+      gso_row(0)
+      k = 1
+      loop = 0
+      while k < n and loop < max_loop:
+        loop += 1
+        if not size_reduce(k):
+          break
+        # ||b_k*||^2 may be computed as <= 0 if it's too small for the precision: then it's swapped
+        if delta_fp * r[k - 1][k - 1] > r[k][k]:
+          swap(k)
+          k = max(1, k - 1)
+          if k == 1:
+            gso_row(0)
+        else:
+          k += 1
+    except (ZeroDivisionError, OverflowError, decimal.InvalidOperation):
+      pass
+
+  return integral_LLL(IntegerLattice.from_matrix(b), delta)
+
+LLL_METHODS = {
+  'integral': integral_LLL,
+  'fp': fp_LLL,
+  'naive': naive_LLL,
+}
+
+def LLL(L, delta=3/4, method='integral'):
+  '''
+  LLL-reduce `L`.
+
+  method:
+    'integral' : integral LLL with exact incremental Gram-Schmidt update (default)
+    'fp'       : floating-point LLL with exact fallback (for large entries)
+    'naive'    : textbook LLL
+  '''
+  if method not in LLL_METHODS:
+    raise ValueError('Unknown LLL method: {!r}'.format(method))
+  return LLL_METHODS[method](L, delta)
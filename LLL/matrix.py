@@ -0,0 +1,85 @@
+from __future__ import print_function, division
+from vector import Vector
+
+class BasisMatrix(object):
+  '''
+  Mutable integer matrix whose rows are lattice basis vectors.
+
+  Rows are plain lists of int, and row operations are done in-place (no Vector is allocated).
+  '''
+  __slots__ = ('rows', 'ncols')
+
+  def __init__(s, rows):
+    s.rows = [list(v) for v in rows]
+    if len(s.rows) == 0:
+      raise ValueError('A basis matrix must have at least one row.')
+    s.ncols = len(s.rows[0])
+    if not all(len(v) == s.ncols for v in s.rows):
+      raise ValueError('All rows must have the same size.')
+
+  @classmethod
+  def from_lattice(cls, L):
+    return cls(L.basis)
+
+  def to_vectors(s):
+    return [Vector(v) for v in s.rows]
+
+  def nrows(s):
+    return len(s.rows)
+
+  def __len__(s):
+    return len(s.rows)
+
+  def __getitem__(s, i):
+    return s.rows[i]
+
+  def __iter__(s):
+    return iter(s.rows)
+
+  def __eq__(s, other):
+    if isinstance(other, BasisMatrix):
+      return s.rows == other.rows
+    elif hasattr(other, '__iter__'):
+      return s.rows == [list(v) for v in other]
+    return False
+
+  def __repr__(s):
+    return '{}({!r})'.format(s.__class__.__name__, s.rows)
+
+  def copy(s):
+    return s.__class__(s.rows)
+
+  def swap_rows(s, i, j):
+    '''
+    row[i] <-> row[j]
+    '''
+    s.rows[i], s.rows[j] = s.rows[j], s.rows[i]
+
+  def sub_mult_row(s, i, j, c):
+    '''
+    row[i] -= c * row[j]
+    '''
+    if c == 0:
+      return
+    ri, rj = s.rows[i], s.rows[j]
+    if c == 1:
+      for k in range(s.ncols):
+        ri[k] -= rj[k]
+    elif c == -1:
+      for k in range(s.ncols):
+        ri[k] += rj[k]
+    else:
+      for k in range(s.ncols):
+        ri[k] -= c * rj[k]
+
+  def inner_product(s, i, j):
+    '''
+    <row[i], row[j]>
+    '''
+    return sum([x * y for x, y in zip(s.rows[i], s.rows[j])])
+
+  def norm2(s, i):
+    '''
+    ||row[i]||^2
+    '''
+    return sum([x * x for x in s.rows[i]])
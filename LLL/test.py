@@ -2,11 +2,15 @@ from __future__ import print_function, division, absolute_import
 import unittest
 import test_vector
 import test_lattice
+import test_matrix
+import test_bkz
 
 def main():
   suite = unittest.TestSuite()
   suite.addTests(unittest.makeSuite(test_vector.TestVector))
   suite.addTests(unittest.makeSuite(test_lattice.TestLattice))
+  suite.addTests(unittest.makeSuite(test_matrix.TestMatrix))
+  suite.addTests(unittest.makeSuite(test_bkz.TestBKZ))
   unittest.TextTestRunner().run(suite)
 
 main()
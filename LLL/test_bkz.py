@@ -0,0 +1,63 @@
+import unittest
+
+from vector import Vector
+from lattice import IntegerLattice, LLL, is_LLL_basis
+from bkz import BKZ, enumerate_svp, gram_schmidt_float, root_hermite_factor
+from test_lattice import gram_determinant
+import random
+
+def knapsack_lattice(n, bits, seed):
+  rand = random.Random(seed)
+  basis = []
+  for i in range(n):
+    basis += [Vector([int(i == j) for j in range(n)] + [rand.randint(0, 2**bits)])]
+  return IntegerLattice(basis)
+
+class TestBKZ(unittest.TestCase):
+  def test_enumerate_svp(s):
+    # Test vector from https://grampus.jaist.ac.jp/hiss/lattice/091109-revise.pdf p.42
+    L1 = IntegerLattice(Vector(4, 1, 2), Vector(4, 7, 2), Vector(3, 1, 7))
+    b = L1.to_matrix()
+    mu, B, _ = gram_schmidt_float(b)
+    u, norm = enumerate_svp(mu, B, float('inf'))
+    v = [sum(c * row[i] for c, row in zip(u, b)) for i in range(3)]
+    s.assertEqual(sum(x * x for x in v), 21)
+    s.assertAlmostEqual(norm, 21)
+
+    u, _ = enumerate_svp(mu, B, 21)
+    s.assertIsNone(u, 'no vector shorter than the radius')
+
+  def test_bkz(s):
+    L1 = knapsack_lattice(16, 40, 1)
+    L2 = LLL(L1)
+    L3 = BKZ(L1, 8)
+    s.assertTrue(is_LLL_basis(L3))
+    s.assertEqual(gram_determinant(L1), gram_determinant(L3))
+    s.assertLessEqual(L3.basis[0].inner_product(L3.basis[0]), L2.basis[0].inner_product(L2.basis[0]))
+    s.assertLessEqual(root_hermite_factor(L3), root_hermite_factor(L2))
+
+    # full enumeration: b_0 is a shortest vector
+    L4 = knapsack_lattice(8, 24, 2)
+    L5 = BKZ(L4, 8)
+    b = L5.to_matrix()
+    mu, B, _ = gram_schmidt_float(b)
+    u, _ = enumerate_svp(mu, B, 0.99 * B[0])
+    s.assertIsNone(u)
+
+    with s.assertRaises(ValueError) as cm:
+      BKZ(L1, 1)
+    s.assertEqual(cm.exception.args[0], 'Block size must be greater than 1.')
+
+  def test_bkz_callback(s):
+    L1 = knapsack_lattice(16, 40, 3)
+    tours = []
+    def callback(tour, L):
+      tours.append(tour)
+      s.assertTrue(is_LLL_basis(L))
+      return True
+    BKZ(L1, 6, callback=callback)
+    s.assertEqual(tours, [1], 'callback aborts reduction')
+
+    tours = []
+    BKZ(L1, 6, max_tours=2, callback=lambda tour, L: tours.append(tour))
+    s.assertLessEqual(len(tours), 2)
@@ -1,10 +1,17 @@
 import unittest
 
 from vector import Vector
-from lattice import gcd, IntegerLattice, gram_schmidt_orthgonalization, LLL, is_LLL_basis
+from lattice import gcd, IntegerLattice, gram_schmidt_orthgonalization, LLL, is_LLL_basis, naive_LLL, integral_LLL, fp_LLL
+import random
 
 IS_PY2 = not hasattr('dummy', '__iter__')
 
+def gram_determinant(L):
+  ret = 1
+  for v in gram_schmidt_orthgonalization(L):
+    ret *= v.inner_product(v)
+  return ret
+
 class TestLattice(unittest.TestCase):
   def test_gcd(s):
     s.assertEqual(gcd(1, 1), 1, 'gcd(1, 1)')
@@ -121,3 +128,56 @@ class TestLattice(unittest.TestCase):
 
     L4_expected = IntegerLattice(bs2_expected)
     s.assertEqual(L4, L4_expected)
+
+  def test_integral_lll(s):
+    bs1 = [Vector(1, 122, 133, 58, 203)]
+    bs1 += [Vector(0, 259, 0, 0, 0)]
+    bs1 += [Vector(0, 0, 259, 0, 0)]
+    bs1 += [Vector(0, 0, 0, 259, 0)]
+    bs1 += [Vector(0, 0, 0, 0, 259)]
+
+    L1 = IntegerLattice(bs1)
+    s.assertEqual(integral_LLL(L1), naive_LLL(L1))
+    s.assertEqual(L1.basis, bs1, 'input lattice must not be modified')
+
+    # knapsack-like lattice
+    rand = random.Random(1)
+    bs2 = []
+    for i in range(12):
+      bs2 += [Vector([int(i == j) for j in range(12)] + [rand.randint(0, 2**32)])]
+    L2 = IntegerLattice(bs2)
+    L3 = integral_LLL(L2)
+    s.assertTrue(is_LLL_basis(L3))
+    s.assertEqual(gram_determinant(L2), gram_determinant(L3))
+
+    with s.assertRaises(ValueError) as cm:
+      integral_LLL(IntegerLattice(Vector(1, 2), Vector(2, 4)))
+    s.assertEqual(cm.exception.args[0], 'A lattice basis must be linearly independent.')
+
+  def test_fp_lll(s):
+    bs1 = [Vector(4, 1, 2)]
+    bs1 += [Vector(4, 7, 2)]
+    bs1 += [Vector(3, 1, 7)]
+    L1 = IntegerLattice(bs1)
+    s.assertEqual(LLL(L1, method='fp'), LLL(L1))
+    s.assertEqual(LLL(L1, method='naive'), LLL(L1))
+
+    with s.assertRaises(ValueError) as cm:
+      LLL(L1, method='hoge')
+    s.assertEqual(cm.exception.args[0], "Unknown LLL method: 'hoge'")
+
+    rand = random.Random(2)
+    # (dimension, bit size): double, scaled double and Decimal
+    for n, bits in [(10, 32), (6, 600), (4, 1200)]:
+      bs2 = []
+      for i in range(n):
+        bs2 += [Vector([int(i == j) for j in range(n)] + [rand.randint(0, 2**bits)])]
+      L2 = IntegerLattice(bs2)
+      L3 = fp_LLL(L2)
+      s.assertTrue(is_LLL_basis(L3))
+      s.assertEqual(gram_determinant(L2), gram_determinant(L3))
+
+    # higher precision
+    L4 = fp_LLL(L2, prec=200)
+    s.assertTrue(is_LLL_basis(L4))
+    s.assertEqual(gram_determinant(L2), gram_determinant(L4))
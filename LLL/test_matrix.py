@@ -0,0 +1,56 @@
+import unittest
+
+from vector import Vector
+from matrix import BasisMatrix
+from lattice import IntegerLattice
+
+class TestMatrix(unittest.TestCase):
+  def test_basic(s):
+    M = BasisMatrix([Vector(1, 2, 3), [4, 5, 6]])
+    s.assertEqual(M.nrows(), 2)
+    s.assertEqual(M.ncols, 3)
+    s.assertEqual(len(M), 2)
+    s.assertEqual(M[1], [4, 5, 6])
+    s.assertEqual(M, [[1, 2, 3], [4, 5, 6]])
+    s.assertEqual(M, BasisMatrix([[1, 2, 3], [4, 5, 6]]))
+    s.assertNotEqual(M, 1)
+    s.assertEqual(repr(M), 'BasisMatrix([[1, 2, 3], [4, 5, 6]])')
+    s.assertEqual(M.to_vectors(), [Vector(1, 2, 3), Vector(4, 5, 6)])
+
+    with s.assertRaises(ValueError) as cm:
+      BasisMatrix([])
+    s.assertEqual(cm.exception.args[0], 'A basis matrix must have at least one row.')
+
+    with s.assertRaises(ValueError) as cm:
+      BasisMatrix([[1, 2], [1, 2, 3]])
+    s.assertEqual(cm.exception.args[0], 'All rows must have the same size.')
+
+  def test_row_operations(s):
+    M = BasisMatrix([[1, 2, 3], [4, 5, 6]])
+    row = M[0]
+    M.sub_mult_row(0, 1, 2)
+    s.assertEqual(M[0], [-7, -8, -9])
+    s.assertTrue(M[0] is row, 'row operation must be in-place')
+    M.sub_mult_row(0, 1, 1)
+    s.assertEqual(M[0], [-11, -13, -15])
+    M.sub_mult_row(0, 1, -1)
+    s.assertEqual(M[0], [-7, -8, -9])
+    M.sub_mult_row(0, 1, 0)
+    s.assertEqual(M[0], [-7, -8, -9])
+
+    M.swap_rows(0, 1)
+    s.assertEqual(M, [[4, 5, 6], [-7, -8, -9]])
+    s.assertEqual(M.inner_product(0, 1), -122)
+    s.assertEqual(M.norm2(0), 77)
+
+    N = M.copy()
+    N.sub_mult_row(0, 1, 1)
+    s.assertEqual(M, [[4, 5, 6], [-7, -8, -9]])
+
+  def test_lattice_conversion(s):
+    L = IntegerLattice(Vector(1, 0, 5), Vector(0, 1, 7))
+    M = L.to_matrix()
+    s.assertEqual(M, [[1, 0, 5], [0, 1, 7]])
+    M.sub_mult_row(1, 0, 1)
+    s.assertEqual(L.basis, [Vector(1, 0, 5), Vector(0, 1, 7)])
+    s.assertEqual(IntegerLattice.from_matrix(M), [Vector(1, 0, 5), Vector(-1, 1, 2)])
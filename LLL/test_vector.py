@@ -61,6 +61,9 @@ class TestVector(unittest.TestCase):
     s.assertEqual(len(v), 3)
     s.assertEqual(len(v2), 2)
 
+    # __slots__
+    s.assertFalse(hasattr(v, '__dict__'))
+
   def test_add(s):
     u = Vector(1, 2, 3)
     v = Vector(4, 5, 6)
@@ -104,7 +107,10 @@ class TestVector(unittest.TestCase):
 
     with s.assertRaises(ValueError) as cm:
       u.scalar_mult("dummy")
-    s.assertEqual(cm.exception.args[0], "'dummy' must be an instance of (<{0} 'int'>, <{0} 'float'>)".format(IS_PY2 and "type" or "class"))
+    if IS_PY2:
+      s.assertEqual(cm.exception.args[0], "'dummy' must be an instance of (<type 'int'>, <type 'long'>, <type 'float'>)")
+    else:
+      s.assertEqual(cm.exception.args[0], "'dummy' must be an instance of (<class 'int'>, <class 'float'>)")
 
   def test_inner_product(s):
     u = Vector(1, 2, 3)
@@ -1,10 +1,17 @@
 from __future__ import print_function, division
 import unittest
 
-class Vector:
+try:
+  INTEGER_TYPES = (int, long)
+except NameError:
+  INTEGER_TYPES = (int, )
+
+class Vector(object):
+  __slots__ = ('v', 'base')
+
   def __init__(s, *args, **_kwargs):
     kwargs = {
-      'base_class': (int, float),
+      'base_class': INTEGER_TYPES + (float, ),
     }
     kwargs.update(_kwargs)
     s.base = kwargs['base_class']
@@ -18,10 +25,18 @@ class Vector:
     if not all(isinstance(x, s.base) for x in s.v):
       raise ValueError('Invalid Argument Specified: {!r}'.format(args))
 
+  @classmethod
+  def _from_tuple(cls, v, base):
+    # Construct without element type check: `v` is a result of operations between checked vectors
+    ret = cls.__new__(cls)
+    ret.v = v
+    ret.base = base
+    return ret
+
   def norm(s):
     import math
     # Calculate euclidean norm
-    return math.sqrt(sum(map(lambda x: x**2, s.v)))
+    return math.sqrt(sum([x * x for x in s.v]))
 
   def _prepare_other_as_vector(s, other):
     if not isinstance(other, s.__class__):
@@ -32,23 +47,23 @@ class Vector:
 
   def add(s, other):
     other = s._prepare_other_as_vector(other)
-    return s.__class__(map(lambda x: x[0] + x[1], zip(s.v, other.v)), base_class=s.base)
+    return s._from_tuple(tuple([x + y for x, y in zip(s.v, other.v)]), s.base)
 
   def sub(s, other):
     other = s._prepare_other_as_vector(other)
-    return s.__class__(map(lambda x: x[0] - x[1], zip(s.v, other.v)), base_class=s.base)
+    return s._from_tuple(tuple([x - y for x, y in zip(s.v, other.v)]), s.base)
 
   def scalar_mult(s, other):
     if not isinstance(other, s.base):
       raise ValueError('{!r} must be an instance of {!r}'.format(other, s.base))
-    return s.__class__(map(lambda x: other * x, s.v), base_class=s.base)
+    return s._from_tuple(tuple([other * x for x in s.v]), s.base)
 
   def inner_product(s, other):
     try:
       other = s._prepare_other_as_vector(other)
     except ValueError:
       raise ValueError('Inner product can calculate between vector and vector: {!r}'.format(other))
-    return sum(map(lambda x: x[0] * x[1], zip(s.v, other.v)))
+    return sum([x * y for x, y in zip(s.v, other.v)])
 
   def __len__(s):
     return len(s.v)
@@ -1,4 +1,8 @@
 # An implementation of Speck32/64
+try:
+  import numpy as np
+except ImportError:
+  np = None
 
 # params
 k = 16
@@ -28,35 +32,116 @@ def merge(x, y):
 
 
 def round_function(x, y, key):
-  ret_x = ((ror(x, alpha) + y) % MOD) ^ key
-  ret_y = rol(y, beta) ^ ret_x
+  # rotations are inlined (rol / ror check their arguments on every call)
+  ret_x = ((((x >> alpha) | (x << (k - alpha))) & MASK) + y) & MASK ^ key
+  ret_y = (((y << beta) & MASK) | (y >> (k - beta))) ^ ret_x
   return ret_x, ret_y
 
 
 def round_function_inverse(x, y, key):
-  ret_y = ror(x ^ y, beta)
-  ret_x = rol(((x ^ key) - ret_y) % MOD, alpha)
+  t = x ^ y
+  ret_y = ((t >> beta) | (t << (k - beta))) & MASK
+  t = ((x ^ key) - ret_y) & MASK
+  ret_x = ((t << alpha) & MASK) | (t >> (k - alpha))
   return ret_x, ret_y
 
 
+def round_function_many(x, y, key):
+  '''
+  round_function on NumPy uint16 arrays (uint16 arithmetic wraps modulo 2^16)
+  '''
+  ret_x = (((x >> alpha) | (x << (k - alpha))) + y) ^ np.uint16(key)
+  ret_y = ((y << beta) | (y >> (k - beta))) ^ ret_x
+  return ret_x, ret_y
+
+
+def round_function_inverse_many(x, y, key):
+  '''
+  round_function_inverse on NumPy uint16 arrays
+  `key` may also be an array (e.g. all the key candidates broadcasted against the ciphertexts)
+  '''
+  t = x ^ y
+  ret_y = (t >> beta) | (t << (k - beta))
+  t = (x ^ np.asarray(key, dtype=np.uint16)) - ret_y
+  ret_x = (t << alpha) | (t >> (k - alpha))
+  return ret_x, ret_y
+
+
+class Speck(object):
+  '''
+  Speck32/64 of `rounds` rounds: the key schedule is expanded once
+  '''
+  def __init__(s, key, rounds=None):
+    if rounds is None:
+      rounds = ROUNDS
+    s.key = key
+    s.rounds = rounds
+    s.keys = expand_key(key, rounds)
+
+  def encrypt(s, m):
+    x, y = split(m)
+    for key in s.keys:
+      x, y = round_function(x, y, key)
+    return merge(x, y)
+
+  def decrypt(s, c):
+    x, y = split(c)
+    for key in reversed(s.keys):
+      x, y = round_function_inverse(x, y, key)
+    return merge(x, y)
+
+  def encrypt_many(s, x, y):
+    '''
+    Encrypt blocks (x[i], y[i]) of uint16 arrays at once (requires NumPy)
+    '''
+    assert np is not None, "NumPy is required"
+    x, y = np.asarray(x, dtype=np.uint16), np.asarray(y, dtype=np.uint16)
+    for key in s.keys:
+      x, y = round_function_many(x, y, key)
+    return x, y
+
+  def decrypt_many(s, x, y):
+    assert np is not None, "NumPy is required"
+    x, y = np.asarray(x, dtype=np.uint16), np.asarray(y, dtype=np.uint16)
+    for key in reversed(s.keys):
+      x, y = round_function_inverse_many(x, y, key)
+    return x, y
+
+
+def split_many(m):
+  '''
+  uint32 array of blocks -> (x, y) (uint16 arrays)
+  '''
+  m = np.asarray(m, dtype=np.uint32)
+  return (m >> k).astype(np.uint16), (m & MASK).astype(np.uint16)
+
+
+def merge_many(x, y):
+  return (np.asarray(x, dtype=np.uint32) << k) | y
+
+
+# the last Speck object used by encrypt / decrypt
+_cipher = None
+
+
+def get_cipher(key):
+  global _cipher
+  if _cipher is None or _cipher.key != key or _cipher.rounds != ROUNDS:
+    _cipher = Speck(key, ROUNDS)
+  return _cipher
+
+
 def encrypt(m, key):
-  keys = expand_key(key)
-  # assert len(keys) == ROUNDS, "Invalid keys specified"
-  x, y = split(m)
-  for i in range(ROUNDS):
-    x, y = round_function(x, y, keys[i])
-  return merge(x, y)
+  return get_cipher(key).encrypt(m)
 
 
 def decrypt(c, key):
-  keys = expand_key(key)
-  x, y = split(c)
-  for i in range(ROUNDS - 1, -1, -1):
-    x, y = round_function_inverse(x, y, keys[i])
-  return merge(x, y)
+  return get_cipher(key).decrypt(c)
 
 
-def expand_key(key):
+def expand_key(key, rounds=None):
+  if rounds is None:
+    rounds = ROUNDS
   k_words = []
   while key != 0:
     k_words += [key & MASK]
@@ -64,18 +149,42 @@ def expand_key(key):
   m = len(k_words)
   ret = [k_words[0]]
   ell = k_words[1:]
-  for i in range(ROUNDS - 1):
+  for i in range(rounds - 1):
     ell += [((ret[i] + ror(ell[i], alpha)) % MOD) ^ i]
     ret += [rol(ret[i], beta) ^ ell[i + m - 1]]
   return ret
 
 
+def invert_key_schedule(keys, i):
+  '''
+  Master key from 4 consecutive round keys keys = [k_i, k_{i+1}, k_{i+2}, k_{i+3}]
+  '''
+  assert len(keys) == 4
+  ell = {}
+  for j in range(3):
+    # k_{j+1} = rol(k_j, beta) ^ ell_{j+3},  ell_{j+3} = ((k_j + ror(ell_j, alpha)) % MOD) ^ j
+    ell[i + j + 3] = rol(keys[j], beta) ^ keys[j + 1]
+    ell[i + j] = rol((((ell[i + j + 3] ^ (i + j)) - keys[j]) % MOD), alpha)
+  key = keys[0]
+  for j in range(i, 0, -1):
+    key = ror(key ^ ell[j + 2], beta)
+    ell[j - 1] = rol((((ell[j + 2] ^ (j - 1)) - key) % MOD), alpha)
+  return key | (ell[0] << k) | (ell[1] << (2 * k)) | (ell[2] << (3 * k))
+
+
 def main():
   plaintext = 0x6574694c
   ciphertext = 0xa86842f2
   keytext = 0x1918111009080100
   assert encrypt(plaintext, keytext) == ciphertext
   assert decrypt(ciphertext, keytext) == plaintext
+  keys = expand_key(keytext)
+  assert invert_key_schedule(keys[10:14], 10) == keytext
+  if np is not None:
+    cipher = Speck(keytext)
+    x, y = cipher.encrypt_many(*split_many([plaintext, plaintext ^ 1]))
+    assert merge_many(x, y)[0] == ciphertext
+    assert merge_many(*cipher.decrypt_many(x, y)).tolist() == [plaintext, plaintext ^ 1]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,209 @@
+from multiprocessing import Process, Pipe, cpu_count
+from collections import deque, namedtuple
+from p_1 import factor_bounded_pm1
+import argparse
+import gmpy
+import json
+import os
+import sys
+import time
+
+'''
+Batch factoring driver: factor many moduli with batch-GCD, p-1 method and (optional) Shirase's ECM.
+
+Usage:
+  python batch_factor.py moduli.txt [-o result.jsonl] [-j jobs] [--b1 B1] [--b2 B2] [--ecm D,...] [--timeout sec]
+
+Input is one modulus per line (decimal or 0x-prefixed hex, `#` starts a comment, '-' reads stdin).
+Output is one JSON object per modulus, in the order of completion:
+  {"index": 3, "n": "...", "p": "...", "q": "...", "method": "pm1", "time": 1.25}
+  {"index": 4, "n": "...", "p": null, "q": null, "method": null, "time": 30.0}
+Integers are written as decimal strings (JSON numbers lose precision in most parsers).
+
+References:
+  * Daniel J. Bernstein. 2004. "How to find smooth parts of integers" (product tree / remainder tree)
+  * Nadia Heninger, Zakir Durumeric, Eric Wustrow, and J. Alex Halderman. 2012. "Mining Your Ps and Qs: Detection of Widespread Weak Keys in Network Devices"
+'''
+
+Task = namedtuple('Task', ['index', 'n', 'method', 'param'])
+
+ECM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ecm')
+
+def read_moduli(f):
+  '''
+  Read moduli from file object `f`
+  '''
+  for line in f:
+    line = line.split('#')[0].strip()
+    if len(line) == 0:
+      continue
+    yield int(line, 0)
+
+def product_tree(xs):
+  '''
+  Product tree of `xs`: ret[0] = xs, ret[i + 1][j] = ret[i][2j] * ret[i][2j + 1], ret[-1] = [prod(xs)]
+  '''
+  tree = [[gmpy.mpz(x) for x in xs]]
+  while len(tree[-1]) > 1:
+    level = tree[-1]
+    tree += [[level[i] * level[i + 1] for i in xrange(0, len(level) - 1, 2)] + level[len(level) // 2 * 2:]]
+  return tree
+
+def batch_gcd(ns):
+  '''
+  gcd(n_i, prod_{j != i} n_j) for all i with product tree and remainder tree (quasi-linear time)
+  '''
+  if len(ns) < 2:
+    return [1] * len(ns)
+  tree = product_tree(ns)
+  rems = tree.pop()
+  while len(tree) > 0:
+    level = tree.pop()
+    rems = [rems[i // 2] % (x * x) for i, x in enumerate(level)]
+  ret = [int(gmpy.gcd(r // n, n)) for r, n in zip(rems, ns)]
+  for i, g in enumerate(ret):
+    if g == ns[i]:
+      # n_i shares both factors (or is equal to another modulus): find them one by one
+      for j, m in enumerate(ns):
+        h = int(gmpy.gcd(ns[i], m))
+        if j != i and 1 < h < ns[i]:
+          ret[i] = h
+          break
+  return ret
+
+def run_pm1(n, b1, b2):
+  return factor_bounded_pm1(n, b1, b2=b2)
+
+def run_ecm(n, D):
+  # Shirase's ECM requires Sage: load it in the worker process only
+  from sage.all import load, ZZ
+  from sage.repl.attach import load_attach_path
+  load_attach_path(ECM_DIR)
+  namespace = {}
+  load(os.path.join(ECM_DIR, 'shirase_method_linear.sage'), namespace)
+  return namespace['factor_shirase_linear'](ZZ(n), D)
+
+def worker(task, options, conn):
+  # factoring functions print their progress: keep stdout for the JSON lines
+  sys.stdout = sys.stderr
+  try:
+    if task.method == 'pm1':
+      g = run_pm1(task.n, options.b1, options.b2)
+    else:
+      g = run_ecm(task.n, task.param)
+  except Exception as e:
+    print >> sys.stderr, '[-] %s(%r) for #%d: %r' % (task.method, task.param, task.index, e)
+    g = None
+  if g is not None and not (1 < g < task.n and task.n % g == 0):
+    g = None
+  conn.send((task, int(g) if g is not None else None))
+  conn.close()
+
+class BatchFactor(object):
+  '''
+  Run tasks over a pool of worker processes.
+
+  Each (modulus, method) pair is one task, and each task runs in its own process, so
+  once a modulus is factored, its running tasks are terminated and pending ones are dropped.
+  Each task reports through its own pipe: a terminated process can't leave a lock shared with
+  the other workers held (as a `multiprocessing.Queue` would), and a process which has reported is joined, not killed.
+  '''
+  def __init__(s, moduli, options, out):
+    s.moduli = moduli
+    s.options = options
+    s.out = out
+    s.start = time.time()
+
+  def emit(s, index, p, method):
+    n = s.moduli[index]
+    record = {
+      'index': index,
+      'n': str(n),
+      'p': str(p) if p is not None else None,
+      'q': str(n // p) if p is not None else None,
+      'method': method,
+      'time': round(time.time() - s.start, 3),
+    }
+    s.out.write(json.dumps(record, sort_keys=True) + '\n')
+    s.out.flush()
+
+  def run(s):
+    options = s.options
+    done = set()
+    # batch-GCD pass
+    for i, g in enumerate(batch_gcd(s.moduli)):
+      if 1 < g < s.moduli[i]:
+        done.add(i)
+        s.emit(i, g, 'batch_gcd')
+    methods = [('pm1', None)] + [('ecm', D) for D in options.ecm]
+    pending = deque(Task(i, n, m, param) for m, param in methods for i, n in enumerate(s.moduli) if i not in done)
+    remaining = {}
+    for task in pending:
+      remaining[task.index] = remaining.get(task.index, 0) + 1
+    running = {}
+    while len(pending) > 0 or len(running) > 0:
+      while len(pending) > 0 and len(running) < options.jobs:
+        task = pending.popleft()
+        if task.index in done:
+          continue
+        conn, child_conn = Pipe(False)
+        p = Process(target=worker, args=(task, options, child_conn))
+        p.daemon = True
+        p.start()
+        # keep only the worker's end open in the worker: EOF when it dies
+        child_conn.close()
+        running[task] = (p, conn, time.time())
+      results = []
+      # tasks which reported (joined) / which are cancelled (terminated)
+      reported = []
+      finished = []
+      for task, (p, conn, t) in running.items():
+        if conn.poll():
+          try:
+            results += [conn.recv()]
+            reported += [task]
+          except EOFError:
+            # died without result (e.g. killed by signal)
+            finished += [task]
+        elif options.timeout is not None and time.time() - t > options.timeout:
+          finished += [task]
+      for task, g in results:
+        if g is not None and task.index not in done:
+          done.add(task.index)
+          s.emit(task.index, g, task.method)
+          # cancel the other tasks of the modulus
+          finished += [t for t in running if t.index == task.index and t not in reported]
+      if len(results) == 0 and len(finished) == 0:
+        time.sleep(0.05)
+      for task in reported + finished:
+        if task not in running:
+          continue
+        p, conn, _ = running.pop(task)
+        if task not in reported and p.is_alive():
+          p.terminate()
+        p.join()
+        conn.close()
+        remaining[task.index] -= 1
+        if remaining[task.index] == 0 and task.index not in done:
+          done.add(task.index)
+          s.emit(task.index, None, None)
+    print >> sys.stderr, '[+] %d moduli, %.3f sec' % (len(s.moduli), time.time() - s.start)
+
+def main():
+  parser = argparse.ArgumentParser(description='Batch factoring of many moduli')
+  parser.add_argument('input', help='file of moduli (one per line), or - for stdin')
+  parser.add_argument('-o', '--output', default='-', help='output JSON lines file')
+  parser.add_argument('-j', '--jobs', type=int, default=cpu_count(), help='number of worker processes')
+  parser.add_argument('--b1', type=int, default=10**6, help='p-1 stage 1 bound')
+  parser.add_argument('--b2', type=int, default=10**8, help='p-1 stage 2 bound')
+  parser.add_argument('--ecm', type=lambda x: map(int, x.split(',')), default=[],
+                      help='discriminants D for Shirase ECM (e.g. 11,19,43; requires Sage)')
+  parser.add_argument('--timeout', type=float, default=None, help='time limit per task [sec]')
+  options = parser.parse_args()
+  f = sys.stdin if options.input == '-' else open(options.input)
+  moduli = list(read_moduli(f))
+  out = sys.stdout if options.output == '-' else open(options.output, 'w')
+  BatchFactor(moduli, options, out).run()
+
+if __name__ == '__main__':
+  main()
@@ -1,40 +1,232 @@
 import gmpy
 import math
+import itertools
+import random
 
 '''
 References: ASIS CTF Finals 2017: Handicraft RSA niklasb's solver
             https://gist.github.com/niklasb/2e91168c630fe591e1b00b5b5f31bed1
+            Peter L. Montgomery. 1987. "Speeding the Pollard and Elliptic Curve Methods of Factorization"
+            Richard P. Brent. 1999. "Factorization of the tenth Fermat number" (Section 3: stage 2 with prime pairing)
 '''
 
-def factor_bounded_pm1(n, b, degree='auto'):
-  print 'start'
-  a = 2
-  i = 0
-  q = 2
+def prime_sieve(lo, hi, segment_size=2**18):
+  '''
+  Generate all primes p such that lo <= p < hi (Segmented sieve of Eratosthenes)
+  Memory usage is O(sqrt(hi) + segment_size).
+  '''
+  r = int(math.sqrt(hi)) + 1
+  small = bytearray([1]) * (r + 1)
+  small[0:2] = bytearray(2)
+  for p in xrange(2, int(math.sqrt(r)) + 1):
+    if small[p]:
+      small[p*p::p] = bytearray(len(xrange(p*p, r + 1, p)))
+  base = [p for p in xrange(2, r + 1) if small[p]]
+  lo = max(lo, 2)
+  for seg_lo in xrange(lo, hi, segment_size):
+    seg_hi = min(seg_lo + segment_size, hi)
+    seg = bytearray([1]) * (seg_hi - seg_lo)
+    for p in base:
+      if p * p >= seg_hi:
+        break
+      start = max(p * p, (seg_lo + p - 1) // p * p)
+      seg[start - seg_lo::p] = bytearray(len(xrange(start, seg_hi, p)))
+    for p in itertools.compress(xrange(seg_lo, seg_hi), seg):
+      yield p
+
+def product_tree(xs):
+  '''
+  Product of `xs` (multiply balanced pairs: much faster than sequential multiplication for big integers)
+  '''
+  xs = [gmpy.mpz(x) for x in xs]
+  if len(xs) == 0:
+    return gmpy.mpz(1)
+  while len(xs) > 1:
+    ys = [xs[i] * xs[i + 1] for i in xrange(0, len(xs) - 1, 2)]
+    if len(xs) % 2 == 1:
+      ys += [xs[-1]]
+    xs = ys
+  return xs[0]
+
+def max_degree(q, b):
+  '''
+  Largest k such that q^k <= b
+  The floating point estimate (e.g. log(243) / log(3) = 4.999...) is corrected with integer multiplications.
+  '''
+  b = int(b)
+  k = int(math.floor(math.log(b, 2) / math.log(q, 2)))
+  t = q**k
+  while t * q <= b:
+    k += 1
+    t *= q
+  while t > b:
+    k -= 1
+    t //= q
+  return k
+
+def prime_power(q, b, degree):
+  '''
+  Exponent of a prime `q` in stage 1:
+    degree = None   : q^k <= b (maximum power of q which is not greater than b)
+    degree = 'auto' : q^k <= n
+    degree = k      : q^k
+  '''
+  if degree is None:
+    return q**max_degree(q, b)
+  return q**degree
+
+def pm1_stage1(n, b, degree=None, a=2, batch_size=1000):
+  '''
+  Stage 1 of p-1 method: compute a^E mod n where E = prod_{q < b} prime_power(q).
+
+  Prime powers of `batch_size` primes are multiplied with product tree and raised at once,
+  and gcd(a - 1, n) is checked once per batch. If that gcd is n, the batch is recomputed
+  one prime (and one factor of q) at a time from the previous value.
+
+  Returns:
+    (factor or None, a^E mod n)
+  '''
   if degree == 'auto':
-    while q < b:
-      i += 1
-      if i % 1000 == 0:
-        print 'Progress:', q, b
-      base = q**int(math.floor(1/ math.log(q, n)))
-      a = pow(a, base, n)
+    n_int = int(n)
+    degree_of = lambda q: max_degree(q, n_int)
+  else:
+    degree_of = lambda q: degree
+  n = gmpy.mpz(n)
+  a = gmpy.mpz(a)
+  primes = prime_sieve(2, b)
+  i = 0
+  while True:
+    batch = list(itertools.islice(primes, batch_size))
+    if len(batch) == 0:
+      return None, a
+    i += len(batch)
+    if i % 10000 < batch_size:
+      print 'Progress:', batch[-1], b
+    exps = [prime_power(q, b, degree_of(q)) for q in batch]
+    a_new = pow(a, product_tree(exps), n)
+    g = gmpy.gcd(a_new - 1, n)
+    if g == n:
+      g = pm1_backtrack(n, a, batch, exps)
+      return (int(g) if g is not None else None), a_new
+    if g != 1:
+      return int(g), a_new
+    a = a_new
+
+def pm1_backtrack(n, a, batch, exps):
+  '''
+  Find nontrivial gcd(a' - 1, n) for the batch which has gcd(a^E - 1, n) = n.
+  '''
+  for q, e in zip(batch, exps):
+    a_new = pow(a, e, n)
+    g = gmpy.gcd(a_new - 1, n)
+    if g == 1:
+      a = a_new
+      continue
+    if g != n:
+      return g
+    # order of a modulo some factor of n is divisible by q: raise a to q one by one
+    while e > 1:
+      a = pow(a, q, n)
+      e //= q
       g = gmpy.gcd(a - 1, n)
-      if g != 1 and g != n:
-        return int(g)
-      q = gmpy.next_prime(q)
+      if g == n:
+        return None
+      if g != 1:
+        return g
     return None
-  else:
-    while q < b:
-      i += 1
-      if i % 1000 == 0:
-        print 'Progress:', q, b
-      base = q**degree
-      a = pow(a, base, n)
-      g = gmpy.gcd(a-1, n)
+  return None
+
+def pm1_stage2(n, a, b1, b2, gcd_interval=1000):
+  '''
+  Stage 2 of p-1 method: find a prime q in (b1, b2] such that a^q = 1 (mod p).
+
+  Baby-step giant-step with prime pairing: write q = k * D +- j (gcd(j, D) = 1, j <= D/2), then
+    a^(k * D) = a^(+-j) (mod p)  <=>  V(k * D) = V(j) (mod p)  where V(i) = a^i + a^(-i)
+  so one multiplication by (V(k * D) - V(j)) covers both of k * D - j and k * D + j.
+  V is computed with Lucas sequence V(i + 1) = V(1) * V(i) - V(i - 1).
+  gcd is checked every `gcd_interval` giant steps, and each term of the interval is checked if it is n.
+
+  Returns:
+    factor or None
+  '''
+  n = gmpy.mpz(n)
+  a = gmpy.mpz(a)
+  a_inv = gmpy.invert(a, n)
+  if a_inv == 0:
+    g = gmpy.gcd(a, n)
+    return int(g) if g != n else None
+  # D: primorial which has only primes < b1 (so gcd(q, D) = 1), about sqrt(b2)
+  D = 2
+  for p in [3, 5, 7, 11, 13]:
+    if p >= b1 or (D * p)**2 > b2:
+      break
+    D *= p
+  # baby steps: V(j) for 1 <= j <= D/2, gcd(j, D) = 1, and V(D)
+  w = (a + a_inv) % n
+  v0, v1 = gmpy.mpz(2), w
+  baby = {}
+  for j in xrange(1, D):
+    if j <= D // 2 and gmpy.gcd(j, D) == 1:
+      baby[j] = v1
+    v0, v1 = v1, (w * v1 - v0) % n
+  vD = v1
+  # giant steps: X(k) = V(k * D)
+  k = 0
+  x0, x1 = gmpy.mpz(2), vD
+  acc = gmpy.mpz(1)
+  terms = []
+  steps = 0
+  primes = prime_sieve(b1 + 1, b2 + 1)
+  for kk, qs in itertools.groupby(primes, lambda q: (q + D // 2) // D):
+    while k < kk:
+      x0, x1 = x1, (vD * x1 - x0) % n
+      k += 1
+    for j in set(abs(q - k * D) for q in qs):
+      t = (x0 - baby[j]) % n
+      terms += [t]
+      acc = acc * t % n
+    steps += 1
+    if steps % gcd_interval == 0:
+      g = pm1_check(n, acc, terms)
+      if g is not None:
+        return g
+      terms = []
+      if steps % (100 * gcd_interval) == 0:
+        print 'Progress:', k * D, b2
+  return pm1_check(n, acc, terms)
+
+def pm1_check(n, acc, terms):
+  g = gmpy.gcd(acc, n)
+  if g == n:
+    # backtrack: one of the terms has a nontrivial gcd or all of them are 0 (mod n)
+    for t in terms:
+      g = gmpy.gcd(t, n)
       if g != 1 and g != n:
         return int(g)
-      q = gmpy.next_prime(q)
     return None
+  if g != 1:
+    return int(g)
+  return None
+
+def factor_bounded_pm1(n, b, degree=None, b2=None):
+  '''
+  Pollard's p-1 method.
+
+  Args:
+    n      : modulus
+    b      : stage 1 bound B1
+    degree : exponent of each prime in stage 1 (see `prime_power`)
+    b2     : (optional) stage 2 bound B2
+
+  Returns:
+    factor of n or None
+  '''
+  print 'start'
+  g, a = pm1_stage1(n, b, degree)
+  if g is not None or b2 is None or b2 <= b:
+    return g
+  print 'stage 2'
+  return pm1_stage2(n, a, b, b2)
 
 if __name__ == '__main__':
   print '[+] Boston Key Party CTF 2017: RSA-buffet key-5.pem'
@@ -42,20 +234,41 @@ if __name__ == '__main__':
 
   p = factor_bounded_pm1(n, 2**16, 10)
   print p
+
+  print '[+] p - 1 = (10^6-smooth) * (prime < 10^8)'
+  rand = random.Random(1)
+  primes = list(prime_sieve(2, 10**6))
+  while True:
+    q = int(gmpy.next_prime(rand.randrange(10**7, 10**8)))
+    p = 2 * q
+    while p.bit_length() < 512:
+      p *= rand.choice(primes)
+    if gmpy.is_prime(p + 1):
+      p += 1
+      break
+  n = p * int(gmpy.next_prime(rand.getrandbits(1536)))
+  print 'q =', q
+  g = factor_bounded_pm1(n, 10**6, b2=10**8)
+  print g, g == p
   '''
-  Tue Sep 19 13:22:47 JST 2017 ~/prog/lab/cryptography/crypto-misc/prime_factorization 100%
   > time python p_1.py
   [+] Boston Key Party CTF 2017: RSA-buffet key-5.pem
   start
-  Progress: 7919 65536
-  Progress: 17389 65536
-  Progress: 27449 65536
-  Progress: 37813 65536
-  Progress: 48611 65536
-  Progress: 59359 65536
   18463356930560971453838089109562090786167420697835032364060502526355101951522469459005132085186109640243049179637784230771525619985937737838169945472692048412226380699487105760788993716257195496980734178090534123199103044077119142605171088793335699575722788289323399685265778921647561234055248973628979087902978301717148606362735522426763773877772153881640285664705622385867092520494253639375799580745445353356024745300293567095271052482140713835413254017982572290854485679559197318493453318312105813338807124670296558504382291169592519052216594412033375436321141905848045231360058665309623497930074117321053331207297
+  [+] p - 1 = (10^6-smooth) * (prime < 10^8)
+  q = 44645129
+  start
+  Progress: 104729 1000000
+  Progress: 224737 1000000
+  Progress: 350377 1000000
+  Progress: 479909 1000000
+  Progress: 611953 1000000
+  Progress: 746773 1000000
+  Progress: 882377 1000000
+  stage 2
+  102315196300445587924596211005982307372598345636210585994720637775247700480561903632411018464258858808613549806218004803642397296632826246690887232277250877443 True
 
-  real    0m7.573s
-  user    0m7.508s
-  sys     0m0.012s
+  real    0m23.284s
+  user    0m22.668s
+  sys     0m0.199s
   '''
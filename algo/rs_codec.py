@@ -0,0 +1,380 @@
+try:
+  import numpy as np
+except ImportError:
+  np = None
+import time
+
+'''
+Table-based Reed-Solomon codec over GF(2^m) (same code as `ReedSolomonCode` of reed_solomon.sage)
+
+Field elements are integers (integer representation of polynomial basis), multiplication uses log / antilog tables.
+Polynomials are lists of coefficients (lowest degree first), and a codeword of length N is
+  [parity (2t symbols)] + [message (K symbols)]
+i.e. C(x) = I(x) x^2t - (I(x) x^2t mod G(x)) where G(x) = prod_{i=b}^{2t+b-1} (x - a^i).
+
+Decoder: syndromes (Horner's method for all 2t points at once) -> error-locator polynomial
+(Berlekamp-Massey or Euclid) -> Chien search -> Forney's formula.
+`encode_many` / `decode_many` process (M, K) / (M, N) arrays of many codewords with NumPy.
+
+References:
+  * Shu Lin and Daniel J. Costello. 2004. "Error Control Coding" (2nd edition), Chapter 7.
+  * James L. Massey. 1969. "Shift-Register Synthesis and BCH Decoding"
+'''
+
+class GF2m(object):
+  '''
+  GF(2^m) = F_2[x] / (prim(x)) with log / antilog tables (x must be a primitive element)
+  '''
+  def __init__(s, m=8, prim=0x11d):
+    s.m = m
+    s.q = 2**m
+    s.prim = prim
+    # EXP has 2(q - 1) entries: EXP[LOG[a] + LOG[b]] needs no reduction modulo q - 1
+    s.EXP = [0] * (2 * (s.q - 1))
+    s.LOG = [0] * s.q
+    x = 1
+    for i in xrange(s.q - 1):
+      s.EXP[i] = x
+      s.LOG[x] = i
+      x <<= 1
+      if x & s.q:
+        x ^= prim
+      assert x != 1 or i == s.q - 2, 'x is not a primitive element'
+    for i in xrange(s.q - 1, 2 * (s.q - 1)):
+      s.EXP[i] = s.EXP[i - (s.q - 1)]
+    if np is not None:
+      # LOG_NP[0] points to zeros after EXP: then EXP_NP[LOG_NP[a] + e] = a * x^e also for a = 0 (0 <= e < q - 1)
+      s.LOG_NP = np.array([2 * (s.q - 1)] + s.LOG[1:], dtype=np.int64)
+      s.EXP_NP = np.array(s.EXP + [0] * s.q, dtype=np.int64)
+
+  def mul(s, a, b):
+    if a == 0 or b == 0:
+      return 0
+    return s.EXP[s.LOG[a] + s.LOG[b]]
+
+  def div(s, a, b):
+    assert b != 0
+    if a == 0:
+      return 0
+    return s.EXP[s.LOG[a] - s.LOG[b] + s.q - 1]
+
+  def pow(s, a, e):
+    '''
+    a^e (e may be negative)
+    '''
+    if a == 0:
+      return 0 if e != 0 else 1
+    return s.EXP[(s.LOG[a] * e) % (s.q - 1)]
+
+  def alpha(s, e):
+    return s.EXP[e % (s.q - 1)]
+
+  def poly_eval(s, f, x):
+    '''
+    f(x) by Horner's method
+    '''
+    ret = 0
+    if x == 0:
+      return f[0] if len(f) > 0 else 0
+    lx = s.LOG[x]
+    for c in reversed(f):
+      ret = (s.EXP[s.LOG[ret] + lx] if ret != 0 else 0) ^ c
+    return ret
+
+  def poly_mul(s, f, g):
+    ret = [0] * (len(f) + len(g) - 1)
+    for i, a in enumerate(f):
+      if a == 0:
+        continue
+      for j, b in enumerate(g):
+        if b != 0:
+          ret[i + j] ^= s.EXP[s.LOG[a] + s.LOG[b]]
+    return ret
+
+  def poly_divmod(s, f, g):
+    '''
+    (f // g, f % g)
+    '''
+    g = poly_trim(g)
+    f = list(f)
+    if len(f) < len(g):
+      return [0], f
+    inv = s.div(1, g[-1])
+    q = [0] * (len(f) - len(g) + 1)
+    for i in xrange(len(f) - len(g), -1, -1):
+      c = s.mul(f[i + len(g) - 1], inv)
+      q[i] = c
+      if c != 0:
+        for j, b in enumerate(g):
+          f[i + j] ^= s.mul(c, b)
+    return q, poly_trim(f[:len(g) - 1])
+
+def poly_trim(f):
+  f = list(f)
+  while len(f) > 1 and f[-1] == 0:
+    f.pop()
+  return f
+
+def poly_add(f, g):
+  if len(f) < len(g):
+    f, g = g, f
+  ret = list(f)
+  for i, c in enumerate(g):
+    ret[i] ^= c
+  return poly_trim(ret)
+
+class ReedSolomonCodec(object):
+  def __init__(s, N, K, b=0, t=None, m=8, prim=0x11d):
+    '''
+    Args:
+      N    : length of codeword
+      K    : length of message
+      b    : (optional) first exponent of roots of generator polynomial
+      t    : (optional) number of correctable errors (default: (N - K) // 2)
+      m    : (optional) symbol size (GF(2^m))
+      prim : (optional) primitive polynomial of GF(2^m)
+    '''
+    assert N > K > 0
+    if t is None:
+      t = (N - K) // 2
+    s.F = GF2m(m, prim)
+    assert N < s.F.q and K + 2 * t <= N
+    s.N = N
+    s.K = K
+    s.b = b
+    s.t = t
+    s.G = [1]
+    for i in xrange(b, 2 * t + b):
+      s.G = s.F.poly_mul(s.G, [s.F.alpha(i), 1])
+    # (roots of G)^j
+    s.roots = [s.F.alpha(i) for i in xrange(b, 2 * t + b)]
+
+  def encode(s, message):
+    '''
+    Encode a message (list of K symbols) to a codeword (list of N symbols)
+    '''
+    assert len(message) == s.K
+    F = s.F
+    n = 2 * s.t
+    # LFSR division: remainder of I(x) x^2t by G(x)
+    r = [0] * n
+    for c in reversed(message):
+      fb = c ^ r[-1]
+      r = [0] + r[:-1]
+      if fb != 0:
+        lf = F.LOG[fb]
+        for k in xrange(n):
+          if s.G[k] != 0:
+            r[k] ^= F.EXP[lf + F.LOG[s.G[k]]]
+    return r + list(message) + [0] * (s.N - s.K - n)
+
+  def syndromes(s, Y):
+    '''
+    S_i = Y(a^(i + b)) for 0 <= i < 2t (Horner's method for all points at once)
+    '''
+    F = s.F
+    logs = [F.LOG[x] for x in s.roots]
+    S = [0] * (2 * s.t)
+    for c in reversed(Y):
+      S = [(F.EXP[F.LOG[x] + l] if x != 0 else 0) ^ c for x, l in zip(S, logs)]
+    return S
+
+  def berlekamp_massey(s, S):
+    '''
+    Error-locator polynomial sigma(x) = prod (1 - X_k x) from syndromes (Berlekamp-Massey algorithm)
+    '''
+    F = s.F
+    C = [1]
+    B = [1]
+    L = 0
+    m = 1
+    bb = 1
+    for n in xrange(len(S)):
+      # discrepancy
+      d = S[n]
+      for i in xrange(1, L + 1):
+        if i < len(C):
+          d ^= F.mul(C[i], S[n - i])
+      if d == 0:
+        m += 1
+        continue
+      coef = F.div(d, bb)
+      T = list(C)
+      shifted = [0] * m + [F.mul(coef, x) for x in B]
+      C = poly_add(C, shifted)
+      if 2 * L <= n:
+        L = n + 1 - L
+        B = T
+        bb = d
+        m = 1
+      else:
+        m += 1
+    return C
+
+  def euclid(s, S):
+    '''
+    Error-locator polynomial by Euclid decoder (Sugiyama et al.; the same as reed_solomon.sage)
+    '''
+    F = s.F
+    n = 2 * s.t
+    x, y = poly_trim(S), [0] * n + [1]
+    u, v = [1], [0]
+    while len(x) - 1 >= s.t and any(x):
+      q, r = F.poly_divmod(y, x)
+      u, v = poly_add(v, F.poly_mul(q, u)), u
+      x, y = r, x
+    if u[0] == 0:
+      # sigma(0) must be 1: more than t errors
+      raise ValueError('Too many errors')
+    gamma = F.div(1, u[0])
+    return [F.mul(gamma, c) for c in u]
+
+  def chien_search(s, sigma):
+    '''
+    Error positions i (0 <= i < N) such that sigma(a^-i) = 0
+    Each term sigma_j a^(-ij) is updated by one multiplication by a^-j per position.
+    '''
+    F = s.F
+    q1 = F.q - 1
+    terms = [(F.LOG[c], j) for j, c in enumerate(sigma) if c != 0]
+    logs = [l for l, _ in terms]
+    ret = []
+    for i in xrange(s.N):
+      v = 0
+      for l in logs:
+        v ^= F.EXP[l]
+      if v == 0:
+        ret += [i]
+      logs = [(l - j) % q1 for l, (_, j) in zip(logs, terms)]
+    return ret
+
+  def forney(s, S, sigma, positions):
+    '''
+    Error values: e_i = X_i^(1 - b) omega(X_i^-1) / sigma'(X_i^-1) where omega(x) = S(x) sigma(x) mod x^2t
+    '''
+    F = s.F
+    omega = F.poly_mul(S, sigma)[:2 * s.t]
+    # formal derivative over characteristic 2: only odd terms remain
+    deriv = [c if j % 2 == 1 else 0 for j, c in enumerate(sigma)][1:]
+    ret = []
+    for i in positions:
+      x_inv = F.alpha(-i)
+      e = F.div(F.poly_eval(omega, x_inv), F.poly_eval(deriv, x_inv))
+      ret += [F.mul(F.alpha(i * (1 - s.b)), e)]
+    return ret
+
+  def correct(s, Y, S=None, method='bm'):
+    '''
+    Corrected codeword of received word `Y` (raises ValueError if it is not correctable)
+    '''
+    if S is None:
+      S = s.syndromes(Y)
+    if not any(S):
+      return list(Y)
+    if method == 'bm':
+      sigma = s.berlekamp_massey(S)
+    else:
+      sigma = s.euclid(S)
+    sigma = poly_trim(sigma)
+    positions = s.chien_search(sigma)
+    if len(positions) != len(sigma) - 1 or len(positions) > s.t:
+      raise ValueError('Too many errors')
+    C = list(Y)
+    for i, e in zip(positions, s.forney(S, sigma, positions)):
+      C[i] ^= e
+    return C
+
+  def decode(s, Y, method='bm'):
+    '''
+    Decode received word `Y` (list of N symbols) to the message
+
+    Args:
+      Y      : received word
+      method : (optional) 'bm' (Berlekamp-Massey) or 'euclid'
+    '''
+    assert len(Y) == s.N
+    return s.correct(Y, method=method)[2 * s.t:2 * s.t + s.K]
+
+  def encode_many(s, messages):
+    '''
+    Encode (M, K) array of messages at once (requires NumPy)
+    '''
+    assert np is not None, 'NumPy is required'
+    F = s.F
+    n = 2 * s.t
+    messages = np.asarray(messages, dtype=np.int64).reshape(-1, s.K)
+    logG = np.array([F.LOG[g] for g in s.G[:n]], dtype=np.int64)
+    nonzero = np.array([g != 0 for g in s.G[:n]])
+    r = np.zeros((len(messages), n), dtype=np.int64)
+    for j in xrange(s.K - 1, -1, -1):
+      fb = messages[:, j] ^ r[:, -1]
+      r[:, 1:] = r[:, :-1].copy()
+      r[:, 0] = 0
+      # fb * G (LOG_NP[0] makes 0 * G = 0)
+      r ^= np.where(nonzero, F.EXP_NP[F.LOG_NP[fb][:, None] + logG], 0)
+    pad = np.zeros((len(messages), s.N - s.K - n), dtype=np.int64)
+    return np.concatenate((r, messages, pad), axis=1)
+
+  def syndromes_many(s, Y):
+    '''
+    Syndromes of (M, N) array of received words at once: shape = (M, 2t)
+    '''
+    F = s.F
+    logs = np.array([F.LOG[x] for x in s.roots], dtype=np.int64)
+    S = np.zeros((len(Y), 2 * s.t), dtype=np.int64)
+    for j in xrange(s.N - 1, -1, -1):
+      S = F.EXP_NP[F.LOG_NP[S] + logs] ^ Y[:, j:j + 1]
+    return S
+
+  def decode_many(s, Y, method='bm'):
+    '''
+    Decode (M, N) array of received words (requires NumPy)
+
+    Words without errors are handled only by the vectorized syndrome computation,
+    and the others are corrected one by one.
+
+    Returns:
+      (messages ((M, K) array), list of indices of uncorrectable words (their messages are left as received))
+    '''
+    assert np is not None, 'NumPy is required'
+    Y = np.asarray(Y, dtype=np.int64).reshape(-1, s.N)
+    S = s.syndromes_many(Y)
+    C = Y.copy()
+    failed = []
+    for i in np.flatnonzero(S.any(axis=1)).tolist():
+      try:
+        C[i] = s.correct(Y[i].tolist(), S[i].tolist(), method)
+      except ValueError:
+        failed += [i]
+    return C[:, 2 * s.t:2 * s.t + s.K], failed
+
+def main():
+  R = ReedSolomonCodec(16, 8)
+  C = R.encode(map(ord, 'hogefuga'))
+  E = [0, 0, 20, 0, 0, 3, 0, 0, 0, 0, 0, 0, 0, 0, 253, 0]
+  Y = [c ^ e for c, e in zip(C, E)]
+  for method in ['bm', 'euclid']:
+    assert ''.join(map(chr, R.decode(Y, method))) == 'hogefuga'
+
+  # throughput: RS(255, 223) with random errors
+  R = ReedSolomonCodec(255, 223, b=1)
+  M = 10000
+  rand = np.random.RandomState(0)
+  messages = rand.randint(0, 256, (M, R.K))
+  start = time.time()
+  C = R.encode_many(messages)
+  print '[+] encode_many: %d codewords/sec' % (M / (time.time() - start))
+  assert C[0].tolist() == R.encode(messages[0].tolist())
+  # 10% of codewords have 1..t errors
+  Y = C.copy()
+  for i in rand.choice(M, M // 10, replace=False):
+    pos = rand.choice(R.N, rand.randint(1, R.t + 1), replace=False)
+    Y[i, pos] ^= rand.randint(1, 256, len(pos))
+  for method in ['bm', 'euclid']:
+    start = time.time()
+    decoded, failed = R.decode_many(Y, method)
+    print '[+] decode_many (%s): %d codewords/sec' % (method, M / (time.time() - start))
+    assert len(failed) == 0 and (decoded == messages).all()
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,59 @@
+import unittest
+
+from p_1 import prime_sieve, max_degree, pm1_stage1, factor_bounded_pm1
+import gmpy
+import random
+
+def smooth_prime(rand, primes, bits, k=20):
+  '''
+  Prime p such that p - 1 = 2^k * (product of `primes`)
+  '''
+  while True:
+    p = 2**k
+    while p.bit_length() < bits:
+      p *= rand.choice(primes)
+    if gmpy.is_prime(p + 1):
+      return p + 1
+
+class TestPm1(unittest.TestCase):
+  def test_sieve(s):
+    s.assertEqual(list(prime_sieve(2, 30)), [2, 3, 5, 7, 11, 13, 17, 19, 23, 29])
+
+  def test_max_degree(s):
+    # log(243) / log(3) = 4.999... in floating point
+    s.assertEqual(max_degree(3, 243), 5)
+    s.assertEqual(max_degree(3, 242), 4)
+    for q in [2, 3, 5, 7, 1009]:
+      for k in [1, 5, 10, 100, 500]:
+        s.assertEqual(max_degree(q, q**k), k)
+        s.assertEqual(max_degree(q, q**k - 1), k - 1)
+
+  def test_stage1_boundary(s):
+    # p - 1 = 2 * 3^5 * (distinct primes < b) with b = 3^5, and 3^5 divides the order of 2 mod p:
+    # 3^5 must be in the exponent
+    rand = random.Random(1)
+    primes = list(prime_sieve(5, 243))
+    while True:
+      p = 2 * 3**5
+      for q in rand.sample(primes, 12):
+        p *= q
+      if gmpy.is_prime(p + 1) and pow(2, p // 3, p + 1) != 1:
+        p += 1
+        break
+    n = p * int(gmpy.next_prime(rand.getrandbits(256)))
+    g, _ = pm1_stage1(n, 243)
+    s.assertEqual(g, p)
+
+  def test_auto_degree_large_modulus(s):
+    # 2^20 > b: only found if the exponent of 2 is chosen by q^k <= n
+    rand = random.Random(1)
+    primes = list(prime_sieve(3, 1000))
+    p = smooth_prime(rand, primes, 256)
+    n = p * int(gmpy.next_prime(rand.getrandbits(2048)))
+    s.assertGreater(n.bit_length(), 2048)
+    g, _ = pm1_stage1(n, 1000, 'auto')
+    s.assertEqual(g, p)
+    s.assertIsNone(factor_bounded_pm1(n, 1000))
+
+if __name__ == '__main__':
+  unittest.main()
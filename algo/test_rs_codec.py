@@ -0,0 +1,39 @@
+import unittest
+
+from rs_codec import ReedSolomonCodec
+import random
+
+class TestReedSolomonCodec(unittest.TestCase):
+  def setUp(s):
+    s.R = ReedSolomonCodec(16, 8)
+    s.rand = random.Random(1)
+
+  def noisy(s, C, errors):
+    Y = list(C)
+    for i in s.rand.sample(range(s.R.N), errors):
+      Y[i] ^= s.rand.randrange(1, 256)
+    return Y
+
+  def test_decode(s):
+    C = s.R.encode(map(ord, 'hogefuga'))
+    for method in ['bm', 'euclid']:
+      for errors in range(s.R.t + 1):
+        s.assertEqual(''.join(map(chr, s.R.decode(s.noisy(C, errors), method))), 'hogefuga')
+
+  def test_decode_many_uncorrectable(s):
+    # words with t + 1 or t + 2 errors: decode_many reports them in `failed` (or miscorrects them), never raises
+    messages = [[s.rand.randrange(256) for _ in range(s.R.K)] for _ in range(3000)]
+    Y = []
+    for i, m in enumerate(messages):
+      errors = s.R.t if i % 3 == 0 else s.R.t + 1 + i % 2
+      Y += [s.noisy(s.R.encode(m), errors)]
+    for method in ['bm', 'euclid']:
+      M, failed = s.R.decode_many(Y, method)
+      s.assertGreater(len(failed), 0)
+      for i in range(len(messages)):
+        if i % 3 == 0:
+          s.assertNotIn(i, failed)
+          s.assertEqual(M[i].tolist(), messages[i])
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import os
+
+'''
+Tests of EC.sage over a prime field (EC.sage does not use Sage itself)
+'''
+
+EC_SAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EC.sage')
+
+class GF(object):
+  '''
+  Prime field with the interface of Qn_tau (elements are int)
+  '''
+  def __init__(s, p):
+    s.p = p
+
+  def __call__(s, x):
+    return x % s.p
+
+  def add(s, a, b):
+    return (a + b) % s.p
+
+  def sub(s, a, b):
+    return (a - b) % s.p
+
+  def mul(s, a, b):
+    return a * b % s.p
+
+  def sqr(s, a):
+    return a * a % s.p
+
+  def mul_int(s, a, k):
+    return a * k % s.p
+
+  def mul_add(s, a, b, c):
+    return (a * b + c) % s.p
+
+  def mul_sub(s, a, b, c):
+    return (a * b - c) % s.p
+
+  def div(s, a, b):
+    if b % s.p == 0:
+      raise ZeroDivisionError
+    return a * pow(b, s.p - 2, s.p) % s.p
+
+  def batch_inv(s, As):
+    return [s.div(1, a) for a in As]
+
+def affine_add(p, A, P, Q):
+  '''
+  Reference addition of affine points (None is the point at infinity)
+  '''
+  if P is None:
+    return Q
+  if Q is None:
+    return P
+  if P[0] == Q[0] and (P[1] + Q[1]) % p == 0:
+    return None
+  if P == Q:
+    l = (3 * P[0] * P[0] + A) * pow(2 * P[1], p - 2, p) % p
+  else:
+    l = (Q[1] - P[1]) * pow(Q[0] - P[0], p - 2, p) % p
+  x = (l * l - P[0] - Q[0]) % p
+  return (x, (l * (P[0] - x) - P[1]) % p)
+
+class TestEC(unittest.TestCase):
+  def setUp(s):
+    ns = {}
+    execfile(EC_SAGE, ns)
+    s.ECPoint = ns['ECPoint']
+    s.p, s.A, s.B = 1019, 1, 3
+    s.E = ns['EC'](GF(s.p), s.A, s.B)
+    # a point P (x != 0, cf. `EC.xmul`) with its multiples P, 2P, ..., (ord P)P = O
+    for x in xrange(1, s.p):
+      r = (x ** 3 + s.A * x + s.B) % s.p
+      y = pow(r, (s.p + 1) // 4, s.p)
+      if y != 0 and y * y % s.p == r:
+        break
+    s.P = (x, y)
+    s.multiples = [None]
+    while True:
+      Q = affine_add(s.p, s.A, s.multiples[-1], s.P)
+      s.multiples += [Q]
+      if Q is None:
+        break
+    s.order = len(s.multiples) - 1
+
+  def point(s, k):
+    Q = s.multiples[k % s.order]
+    return (0, 1, 0) if Q is None else (Q[0], Q[1], 1)
+
+  def test_mul(s):
+    P = s.ECPoint(s.P[0], s.P[1], 1)
+    ks = range(1, 40) + [s.order + k for k in range(-3, 10)] + [2 * s.order + k for k in range(-3, 10)]
+    for w in [2, 3, 4, 5]:
+      for k in ks:
+        s.assertEqual(tuple(s.E.mul(k, P, w)), s.point(k), 'w = %d, k = %d (ord P = %d)' % (w, k, s.order))
+      s.assertEqual(tuple(s.E.mul(-(s.order + 1), P, w)), s.point(-1))
+
+  def test_xmul(s):
+    P = s.ECPoint(s.P[0], s.P[1], 1)
+    for k in range(1, 20) + [s.order - 1, s.order, s.order + 1, s.order + 2]:
+      Q = s.multiples[k % s.order]
+      s.assertEqual(s.E.xmul(k, P), None if Q is None else Q[0], 'k = %d' % k)
+
+if __name__ == '__main__':
+  unittest.main()
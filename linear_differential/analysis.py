@@ -0,0 +1,264 @@
+from toy_cipher import S, P
+import numpy as np
+import cPickle as pickle
+import hashlib
+import math
+import os
+
+'''
+Differential / Linear analysis of S-boxes and characteristic search for ToyCipher
+
+All tables are computed with NumPy via Walsh-Hadamard transform (except BCT),
+and cached in `CACHE_DIR` keyed by the S-box.
+
+References:
+  * [1] Howard M. Heys. 2002. "A Tutorial on Linear and Differential Cryptanalysis"
+  * [2] Mitsuru Matsui. 1994. "On Correlation Between the Order of S-boxes and the Strength of DES" (branch-and-bound search)
+  * [3] Carlos Cid, Tao Huang, Thomas Peyrin, Yu Sasaki, and Ling Song. 2018. "Boomerang Connectivity Table: A New Cryptanalysis Tool"
+'''
+
+CACHE_DIR = os.environ.get('SBOX_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'crypto_misc', 'sbox'))
+
+def cache_key(*args):
+  h = hashlib.sha1()
+  for x in args:
+    h.update(np.asarray(x, dtype=np.int64).tobytes() if isinstance(x, (list, tuple, np.ndarray)) else repr(x))
+    h.update('|')
+  return h.hexdigest()
+
+def cached(name, key, f):
+  '''
+  Return f() cached in CACHE_DIR/name_key.pickle (CACHE_DIR = None disables the cache)
+  '''
+  if CACHE_DIR is None:
+    return f()
+  path = os.path.join(CACHE_DIR, '%s_%s.pickle' % (name, key))
+  if os.path.exists(path):
+    with open(path, 'rb') as fp:
+      return pickle.load(fp)
+  ret = f()
+  if not os.path.isdir(CACHE_DIR):
+    os.makedirs(CACHE_DIR)
+  # write to temporary file and rename: never leaves a broken cache file
+  tmp = '%s.%d' % (path, os.getpid())
+  with open(tmp, 'wb') as fp:
+    pickle.dump(ret, fp, pickle.HIGHEST_PROTOCOL)
+  os.rename(tmp, path)
+  return ret
+
+def sbox_size(S):
+  '''
+  (input bits, output bits) of S-box `S`
+  '''
+  n = int(math.log(len(S), 2))
+  assert len(S) == 2**n, 'Size of S-box must be a power of 2'
+  return n, max(1, int(max(S)).bit_length())
+
+def walsh_hadamard(a):
+  '''
+  Unnormalized Walsh-Hadamard transform along the last axis: ret[..., u] = sum_x (-1)^(u.x) a[..., x]
+  '''
+  a = np.array(a, dtype=np.int64)
+  shape = a.shape
+  N = shape[-1]
+  h = 1
+  while h < N:
+    a = a.reshape(shape[:-1] + (N // (2 * h), 2, h))
+    x, y = a[..., 0, :], a[..., 1, :]
+    a = np.stack((x + y, x - y), axis=-2)
+    h *= 2
+  return a.reshape(shape)
+
+def parity(x):
+  '''
+  Parity of each element of integer array `x`
+  '''
+  x = np.array(x, dtype=np.int64)
+  ret = np.zeros(x.shape, dtype=np.int64)
+  while x.any():
+    ret ^= x & 1
+    x >>= 1
+  return ret
+
+def walsh_spectrum(S):
+  '''
+  W[u][v] = sum_x (-1)^(u.x + v.S(x))
+  '''
+  def f():
+    n, m = sbox_size(S)
+    Sa = np.asarray(S, dtype=np.int64)
+    # F[v][x] = (-1)^(v.S(x))
+    F = 1 - 2 * parity(np.arange(2**m, dtype=np.int64)[:, None] & Sa[None, :])
+    return walsh_hadamard(F).T.copy()
+  return cached('walsh', cache_key(S), f)
+
+def lat(S):
+  '''
+  Linear approximation table: LAT[u][v] = #{x | u.x = v.S(x)} - 2^(n-1) (cf. [1])
+  '''
+  return walsh_spectrum(S) // 2
+
+def ddt(S):
+  '''
+  Difference distribution table: DDT[a][b] = #{x | S(x) ^ S(x ^ a) = b}
+
+  Computed from Walsh spectrum: DDT = H W^2 H / 2^(n + m) where H is Hadamard matrix.
+  '''
+  def f():
+    n, m = sbox_size(S)
+    W2 = walsh_spectrum(S)**2
+    return walsh_hadamard(walsh_hadamard(W2).T).T >> (n + m)
+  return cached('ddt', cache_key(S), f)
+
+def bct(S):
+  '''
+  Boomerang connectivity table (cf. [3]): BCT[a][b] = #{x | S^-1(S(x) ^ b) ^ S^-1(S(x ^ a) ^ b) = a}
+  S must be bijective. It takes O(2^(3n)) time (vectorized for each b).
+  '''
+  def f():
+    N = len(S)
+    assert sorted(S) == range(N), 'S-box must be bijective'
+    Sa = np.asarray(S, dtype=np.int64)
+    Sinv = np.argsort(Sa)
+    x = np.arange(N, dtype=np.int64)
+    # (a, x) -> x ^ a
+    xor = x[:, None] ^ x[None, :]
+    ret = np.zeros((N, N), dtype=np.int64)
+    for b in xrange(N):
+      # S^-1(S(x) ^ b) ^ S^-1(S(x ^ a) ^ b) = a  <=>  z[x] = z[x ^ a]  where z[x] = S^-1(S(x) ^ b) ^ x
+      z = Sinv[Sa ^ b] ^ x
+      ret[:, b] = (z[xor] == z[None, :]).sum(axis=1)
+    return ret
+  return cached('bct', cache_key(S), f)
+
+def differential_uniformity(S):
+  '''
+  max_{a != 0, b} DDT[a][b]
+  '''
+  return int(ddt(S)[1:].max())
+
+def linearity(S):
+  '''
+  max_{u, v != 0} |W[u][v]|
+  '''
+  return int(np.abs(walsh_spectrum(S)[:, 1:]).max())
+
+def nonlinearity(S):
+  '''
+  Nonlinearity: 2^(n-1) - linearity(S) / 2
+  '''
+  n, _ = sbox_size(S)
+  return 2**(n - 1) - linearity(S) // 2
+
+def transitions(S, linear=False):
+  '''
+  For each input difference (mask) a, list of (weight, b, count) sorted by weight, where
+    differential : count = DDT[a][b],     weight = -log2(count / 2^n)
+    linear       : count = |2 LAT[a][b]|, weight = -log2(count / 2^n) (-log2 of correlation)
+  '''
+  n, _ = sbox_size(S)
+  T = np.abs(walsh_spectrum(S)) if linear else ddt(S)
+  ret = []
+  for a in xrange(len(T)):
+    row = [(n - math.log(c, 2), b, c) for b, c in enumerate(T[a].tolist()) if c != 0]
+    ret += [sorted(row)]
+  return ret
+
+def best_characteristic(rounds, S=S, P=P, linear=False):
+  '''
+  Branch-and-bound search (cf. [2]) of the best differential (or linear) characteristic of `rounds`-round ToyCipher.
+
+  Args:
+    rounds : number of rounds (number of S-layers)
+    S      : S-box
+    P      : bit permutation of P-layer
+    linear : search linear characteristic instead of differential characteristic
+
+  Returns:
+    (probability, trail) where trail is a list of (input difference, output difference of S-layer) of each round.
+    For linear characteristics, probability is the absolute correlation (= 2 * |bias|).
+  '''
+  def f():
+    return _best_characteristic(rounds, S, P, linear)
+  return cached('characteristic', cache_key(S, P, rounds, linear), f)
+
+def _best_characteristic(rounds, S, P, linear):
+  n, _ = sbox_size(S)
+  size = len(P)
+  k = size // n
+  mask = 2**n - 1
+  T = transitions(S, linear)
+  min_weight = min(row[0][0] for row in T[1:])
+  # P-layer on `size`-bit words
+  Pn = [[sum(((x >> j) & 1) << P[i * n + j] for j in xrange(n)) for x in xrange(2**n)] for i in xrange(k)]
+  eps = 1e-9
+
+  def search(r, best):
+    '''
+    Best r-round characteristic with weight < best[0] (best = [weight, trail], updated in-place)
+    '''
+    trail = [None] * r
+
+    def round_search(i, a, w):
+      # first round: every nonzero input difference
+      if i == r:
+        if w < best[0] - eps:
+          best[0], best[1] = w, list(trail)
+        return
+      # lower bound: weight of active S-boxes of this round + best of the remaining rounds
+      active = [j for j in xrange(k) if (a >> (n * j)) & mask]
+      if w + len(active) * min_weight + B[r - i - 1] >= best[0] - eps:
+        return
+      sbox_search(i, a, active, 0, 0, w, 0)
+
+    def sbox_search(i, a, active, idx, b, w, y):
+      if idx == len(active):
+        trail[i] = (a, b)
+        round_search(i + 1, y, w)
+        return
+      j = active[idx]
+      rest = (len(active) - idx - 1) * min_weight + B[r - i - 1]
+      for tw, tb, _ in T[(a >> (n * j)) & mask]:
+        if w + tw + rest >= best[0] - eps:
+          break
+        sbox_search(i, a, active, idx + 1, b | (tb << (n * j)), w + tw, y ^ Pn[j][tb])
+
+    # order first-round inputs by the number of active S-boxes
+    firsts = sorted(xrange(1, 2**size), key=lambda a: sum(1 for j in xrange(k) if (a >> (n * j)) & mask))
+    for a in firsts:
+      round_search(0, a, 0)
+
+  # B[r]: weight of the best r-round characteristic
+  B = [0.0]
+  result = None
+  for r in xrange(1, rounds + 1):
+    best = [float('inf'), None]
+    search(r, best)
+    B += [best[0]]
+    result = best
+  weight, trail = result
+  prob = 1
+  for a, b in trail:
+    for j in xrange(k):
+      aj, bj = (a >> (n * j)) & mask, (b >> (n * j)) & mask
+      if aj:
+        c = dict((tb, tc) for _, tb, tc in T[aj])[bj]
+        prob *= float(c) / 2**n
+  return prob, trail
+
+def main():
+  print '[+] S-box:', S
+  print '[+] Differential uniformity:', differential_uniformity(S)
+  print '[+] Nonlinearity:', nonlinearity(S)
+  print '[+] Maximum BCT entry:', bct(S)[1:, 1:].max()
+  for r in xrange(1, 4):
+    prob, trail = best_characteristic(r)
+    print '[+] Best %d-round differential characteristic: %s (2^%.2f)' % (r, prob, math.log(prob, 2))
+    print '    ' + ' -> '.join('%04x' % a for a, b in trail)
+  for r in xrange(1, 4):
+    prob, trail = best_characteristic(r, linear=True)
+    print '[+] Best %d-round linear characteristic: correlation %s (bias 2^%.2f)' % (r, prob, math.log(prob / 2, 2))
+    print '    ' + ' -> '.join('%04x' % a for a, b in trail)
+
+if __name__ == '__main__':
+  main()
@@ -1,12 +1,9 @@
 from toy_cipher import S
+from analysis import ddt
 from fractions import gcd
 
 if __name__ == '__main__':
-  diffs = [[0 for _ in xrange(16)] for _ in xrange(16)]
-
-  for i in xrange(16):
-    for j in xrange(16):
-        diffs[i ^ j][S[i] ^ S[j]] += 1
+  diffs = ddt(S).tolist()
 
   print '[+] Difference Table: '
   print
@@ -1,3 +1,8 @@
+try:
+  import numpy as np
+except ImportError:
+  np = None
+
 P = [0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15]
 S = [14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7]
 Pinv = [P.index(i) for i in xrange(16)]
@@ -48,6 +53,26 @@ def PboxInv(i):
     o[Pinv[j]] = i[j]
   return merge16_bits(o)
 
+def round_function(x):
+  return Pbox(merge4(map(Sbox, split4(x))))
+
+def round_function_inverse(x):
+  return merge4(map(SboxInv, split4(PboxInv(x))))
+
+# P-layer is linear, so round_function(x) = ROUND_T0[x & 0xff] ^ ROUND_T1[x >> 8]
+ROUND_T0 = [Pbox(S[b & 0xf] | S[b >> 4] << 4) for b in xrange(256)]
+ROUND_T1 = [Pbox((S[b & 0xf] | S[b >> 4] << 4) << 8) for b in xrange(256)]
+# ROUND[x] = round_function(x), ROUND_INV[x] = round_function_inverse(x)
+ROUND = [ROUND_T0[x & 0xff] ^ ROUND_T1[x >> 8] for x in xrange(2**16)]
+ROUND_INV = [0] * 2**16
+for x, y in enumerate(ROUND):
+  ROUND_INV[y] = x
+del x, y
+
+if np is not None:
+  ROUND_NP = np.array(ROUND, dtype=np.uint16)
+  ROUND_INV_NP = np.array(ROUND_INV, dtype=np.uint16)
+
 class ToyCipher(object):
   def __init__(s, key, rounds=4):
     assert 0 <= key < 2**16
@@ -57,15 +82,53 @@ class ToyCipher(object):
   def encrypt(s, m):
     assert 0 <= m < 2**16
     for r in xrange(s.r):
-      m = Pbox(merge4(map(Sbox, split4(m)))) ^ s.k
+      m = ROUND[m] ^ s.k
     return m
 
   def decrypt(s, c):
     assert 0 <= c < 2**16
     for r in xrange(s.r):
-      c = merge4(map(SboxInv, split4(PboxInv(c ^ s.k))))
+      c = ROUND_INV[c ^ s.k]
     return c
 
+  def encrypt_many(s, ms):
+    '''
+    Encrypt many plaintexts at once (requires NumPy)
+
+    Args:
+      ms : array of plaintexts
+
+    Returns:
+      numpy.ndarray (uint16) of ciphertexts
+    '''
+    m = np.asarray(ms, dtype=np.uint16)
+    k = np.uint16(s.k)
+    for r in xrange(s.r):
+      m = ROUND_NP[m] ^ k
+    return m
+
+  def decrypt_many(s, cs):
+    '''
+    Decrypt many ciphertexts at once (requires NumPy)
+    '''
+    c = np.asarray(cs, dtype=np.uint16)
+    k = np.uint16(s.k)
+    for r in xrange(s.r):
+      c = ROUND_INV_NP[c ^ k]
+    return c
+
+  def codebook(s):
+    '''
+    Full codebook: codebook()[m] = encrypt(m) for all 2^16 plaintexts m
+    '''
+    return s.encrypt_many(np.arange(2**16, dtype=np.uint16))
+
+  def decrypt_codebook(s):
+    '''
+    Full inverse codebook: decrypt_codebook()[c] = decrypt(c)
+    '''
+    return s.decrypt_many(np.arange(2**16, dtype=np.uint16))
+
 def main():
   cipher = ToyCipher(0xdead)
   m = 0x1234
@@ -73,6 +136,10 @@ def main():
   m2 = cipher.decrypt(c)
   print hex(c)
   print m2 == m
+  if np is not None:
+    table = cipher.codebook()
+    print table[m] == c
+    print (cipher.decrypt_codebook()[table] == np.arange(2**16)).all()
 
 if __name__ == '__main__':
   main()